@@ -0,0 +1,198 @@
+"""
+Shared Circuit Breaker
+State lives in SQLite (core/shared_state) so every worker process fails fast
+once any of them has seen a dependency go down
+
+closed ──(threshold failures)──▶ open ──(timeout)──▶ half_open
+  ▲                                ▲                     │
+  └──────── probe succeeds ────────┼── probe fails ──────┘
+
+In half_open exactly one caller (cluster-wide) gets to probe; the probe
+holds a lease so a crashed worker cannot wedge the breaker.
+"""
+import logging
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from core.config import settings
+from core.shared_state import SharedStateDB, shared_state
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuit_breakers (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    failure_count INTEGER NOT NULL DEFAULT 0,
+    opened_at REAL NOT NULL DEFAULT 0,
+    probe_until REAL NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+shared_state.register_schema(_SCHEMA)
+
+
+class CircuitBreaker:
+    """
+    Process-safe breaker with single-probe half-open state
+
+    Storage errors never block traffic: the breaker fails open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        timeout: float = 60,
+        probe_lease: Optional[float] = None,
+        store: SharedStateDB = shared_state
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.timeout = timeout
+        self.probe_lease = probe_lease if probe_lease is not None else settings.CIRCUIT_BREAKER_PROBE_LEASE
+        self.store = store
+        if store is not shared_state:
+            store.register_schema(_SCHEMA)
+
+    def _read(self, conn) -> sqlite3.Row:
+        row = conn.execute("SELECT * FROM circuit_breakers WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO circuit_breakers (name, state, updated_at) VALUES (?, ?, ?)",
+                (self.name, CLOSED, time.time())
+            )
+            row = conn.execute("SELECT * FROM circuit_breakers WHERE name = ?", (self.name,)).fetchone()
+        return row
+
+    def _write(self, conn, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        conn.execute(
+            f"UPDATE circuit_breakers SET {columns} WHERE name = ?",
+            (*fields.values(), self.name)
+        )
+
+    def allows_attempt(self) -> bool:
+        """Read-only check: would `can_attempt()` let a call through right now?"""
+        try:
+            rows = self.store.query("SELECT * FROM circuit_breakers WHERE name = ?", (self.name,))
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker '{self.name}' storage error: {e}")
+            return True
+        if not rows:
+            return True
+
+        row, now = rows[0], time.time()
+        if row["state"] == CLOSED:
+            return True
+        if row["state"] == OPEN:
+            return now - row["opened_at"] >= self.timeout
+        return now >= row["probe_until"]
+
+    def can_attempt(self) -> bool:
+        """
+        Claim permission for one call
+
+        closed → yes; open → no until timeout, then this caller becomes the
+        half-open probe; half_open → no while another caller's probe lease runs.
+        """
+        try:
+            with self.store.transaction() as conn:
+                row = self._read(conn)
+                now = time.time()
+
+                if row["state"] == CLOSED:
+                    return True
+
+                if row["state"] == OPEN and now - row["opened_at"] < self.timeout:
+                    return False
+
+                if row["state"] == HALF_OPEN and now < row["probe_until"]:
+                    return False
+
+                self._write(conn, state=HALF_OPEN, probe_until=now + self.probe_lease)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker '{self.name}' storage error: {e}")
+            return True
+
+        logger.info(f"🔄 Circuit breaker '{self.name}' half-open - sending probe")
+        return True
+
+    def release_probe(self):
+        """
+        Give back a half-open probe without a verdict (the call was cancelled),
+        so the next caller can probe instead of waiting out the lease
+        """
+        try:
+            with self.store.transaction() as conn:
+                if self._read(conn)["state"] != HALF_OPEN:
+                    return
+                self._write(conn, probe_until=0)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker '{self.name}' storage error: {e}")
+
+    def record_success(self):
+        try:
+            with self.store.transaction() as conn:
+                previous = self._read(conn)["state"]
+                self._write(conn, state=CLOSED, failure_count=0, opened_at=0, probe_until=0)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker '{self.name}' storage error: {e}")
+            return
+
+        if previous != CLOSED:
+            logger.info(f"🟢 Circuit breaker '{self.name}' CLOSED")
+
+    def record_failure(self):
+        try:
+            with self.store.transaction() as conn:
+                row = self._read(conn)
+                failures = row["failure_count"] + 1
+                trip = row["state"] == HALF_OPEN or failures >= self.failure_threshold
+                if trip:
+                    self._write(conn, state=OPEN, failure_count=failures, opened_at=time.time(), probe_until=0)
+                else:
+                    self._write(conn, failure_count=failures)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker '{self.name}' storage error: {e}")
+            return
+
+        if trip and row["state"] != OPEN:
+            logger.warning(f"🔴 Circuit breaker '{self.name}' OPEN after {failures} failures")
+
+    def snapshot(self) -> Dict:
+        try:
+            rows = self.store.query("SELECT * FROM circuit_breakers WHERE name = ?", (self.name,))
+        except sqlite3.Error:
+            rows = []
+        return _row_to_dict(rows[0]) if rows else {"name": self.name, "state": CLOSED, "failure_count": 0}
+
+    @property
+    def state(self) -> str:
+        return self.snapshot()["state"]
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict:
+    return {
+        "name": row["name"],
+        "state": row["state"],
+        "failure_count": row["failure_count"],
+        "opened_at": row["opened_at"] or None,
+        "probe_until": row["probe_until"] or None,
+    }
+
+
+def get_breaker_states(store: SharedStateDB = shared_state) -> List[Dict]:
+    """Every breaker known to any worker on this host"""
+    try:
+        rows = store.query("SELECT * FROM circuit_breakers ORDER BY name")
+    except sqlite3.Error as e:
+        return [{"error": str(e)}]
+    return [_row_to_dict(row) for row in rows]
@@ -40,6 +40,27 @@ class Settings(BaseSettings):
     USE_EDGE_TTS: bool = True
     USE_COQUI_TTS: bool = True
     COQUI_MODEL: str = "tts_models/multilingual/multi-dataset/xtts_v2"
+    VOICE_CLONE_DIR: str = "data/voice_clones"  # Persisted XTTS speaker latents
+    
+    # Edge-TTS Client (shared concurrency cap + rate limit + retries)
+    EDGE_TTS_MAX_CONCURRENCY: int = 4
+    EDGE_TTS_RATE_PER_SECOND: float = 2.0
+    EDGE_TTS_BURST: int = 4
+    EDGE_TTS_MAX_RETRIES: int = 3
+    EDGE_TTS_BACKOFF_BASE: float = 0.5  # seconds
+    EDGE_TTS_BACKOFF_MAX: float = 8.0  # seconds
+    EDGE_TTS_WSS_URL: Optional[str] = None  # endpoint override incl. "?query" (scripts/edge_tts_standin.py)
+    
+    # TTS Output Cache (shared by /tts/preview and full generation)
+    TTS_CACHE_DIR: str = "data/tts_cache"
+    TTS_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    TTS_PREVIEW_MAX_CHARS: int = 5000
+    
+    # Audio Post-Processing (NumPy stage, replaces pydub normalization)
+    AUDIO_SAMPLE_RATE: int = 16000  # Hz, required for LivePortrait
+    AUDIO_TARGET_LUFS: float = -16.0
+    AUDIO_TRIM_THRESHOLD_DB: float = -45.0  # dBFS, frames below are silence
+    AUDIO_TRIM_PADDING_MS: int = 80
     
     # Optional Premium (ElevenLabs)
     ELEVENLABS_API_KEY: Optional[str] = None
@@ -49,10 +70,63 @@ class Settings(BaseSettings):
     
     # HeyGen API (Production-Ready Alternative)
     HEYGEN_API_KEY: Optional[str] = None
+    HEYGEN_BASE_URL: str = "https://api.heygen.com/v2"  # point at a local stand-in for testing
+    HEYGEN_POOL_LIMIT: int = 20  # total pooled connections
+    HEYGEN_POOL_LIMIT_PER_HOST: int = 10
+    HEYGEN_DNS_CACHE_TTL: int = 300  # seconds
+    HEYGEN_KEEPALIVE_TIMEOUT: float = 30.0  # idle seconds before a pooled connection closes
+    HEYGEN_CONNECT_TIMEOUT: float = 10.0
+    HEYGEN_API_TIMEOUT: float = 30.0  # JSON API calls (total)
+    HEYGEN_TRANSFER_TIMEOUT: float = 600.0  # asset uploads / video download (total)
+    HEYGEN_UPLOAD_CHUNK_SIZE: int = 256 * 1024  # bytes per streamed upload chunk
+    HEYGEN_AUDIO_UPLOAD_CODEC: Optional[str] = "mp3"  # transcode before upload: "mp3", "aac" or None
+    HEYGEN_AUDIO_UPLOAD_BITRATE: str = "128k"
+    HEYGEN_ASSET_CACHE_TTL: int = 7 * 86400  # reuse uploaded asset ids (keep below HeyGen's retention)
+    
+    # HeyGen Completion (webhook first, adaptive polling as fallback)
+    HEYGEN_WEBHOOK_URL: Optional[str] = None  # public URL of /api/v1/webhooks/heygen
+    HEYGEN_WEBHOOK_SECRET: Optional[str] = None  # HMAC-SHA256 secret (required, webhooks stay off without it)
+    HEYGEN_RENDER_OVERHEAD: float = 30.0  # seconds of queue/setup per job
+    HEYGEN_RENDER_RATIO: float = 3.0  # initial render seconds per audio second (learned per process)
+    HEYGEN_POLL_MIN_INTERVAL: float = 2.0
+    HEYGEN_POLL_MAX_INTERVAL: float = 30.0
+    HEYGEN_WEBHOOK_POLL_INTERVAL: float = 60.0  # safety-net API polls while waiting for a webhook
+    HEYGEN_COMPLETION_TIMEOUT: float = 300.0  # minimum; scaled up for long audio
     
     # Animation Engine Selection
-    # Options: "heygen" (recommended), "liveportrait" (unreliable), "sadtalker" (local)
+    # Options: "heygen" (recommended), "liveportrait" (unreliable), "local" (offline CPU)
     ANIMATION_ENGINE: str = "heygen"
+    LOCAL_ANIMATION_ENABLED: bool = True  # Offline CPU engine as last resort
+    
+    # Engine Routing (health-scored, see engines/engine_registry.py)
+    ENGINE_HEALTH_EWMA_ALPHA: float = 0.2
+    ENGINE_BREAKER_THRESHOLD: int = 3  # consecutive failures before opening
+    ENGINE_BREAKER_COOLDOWN: int = 120  # seconds before a half-open probe
+    ENGINE_COST_WEIGHT: float = 30.0  # seconds of latency one credit is worth
+    ENGINE_PREFERENCE_BONUS: float = 0.5  # score multiplier for ANIMATION_ENGINE
+    
+    # Shared Cross-Process State (SQLite; circuit breakers etc.)
+    SHARED_STATE_DB: str = "data/shared_state.db"
+    SHARED_STATE_BUSY_TIMEOUT: float = 0.1  # seconds; callers run on the event loop and fail open
+    CIRCUIT_BREAKER_PROBE_LEASE: int = 300  # seconds a half-open probe holds the slot
+    
+    # Result Downloads (HeyGen / LivePortrait / avatar images, see core/downloads.py)
+    DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes buffered per off-loop write
+    DOWNLOAD_MAX_RETRIES: int = 3  # Range resumes after a dropped connection
+    DOWNLOAD_CONNECT_TIMEOUT: float = 10.0
+    DOWNLOAD_READ_TIMEOUT: float = 60.0  # max stall between bytes
+    DOWNLOAD_BACKOFF_MAX: float = 8.0
+    
+    # Animation Result Cache (skip the engine for identical image + audio + settings)
+    ANIMATION_CACHE_ENABLED: bool = True
+    ANIMATION_CACHE_DIR: str = "data/animation_cache"
+    ANIMATION_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    
+    # Hedged Animation Requests (start the next engine when the first is slow)
+    ANIMATION_HEDGING_ENABLED: bool = True
+    ANIMATION_HEDGE_PERCENTILE: float = 0.9  # of the primary's observed latency
+    ANIMATION_HEDGE_MIN_SAMPLES: int = 10  # no hedging until this many successes
+    ANIMATION_HEDGE_WINDOW: int = 100  # recent latencies kept per engine
     
     # Voice Configuration - BEST FREE VOICES
     # Edge-TTS Neural Voices (90% premium quality)
@@ -98,6 +172,37 @@ class Settings(BaseSettings):
     DEFAULT_VOICE_MALE: str = "en-US-GuyNeural"
     DEFAULT_VOICE_FEMALE: str = "en-US-AriaNeural"
     DEFAULT_VOICE_HINDI: str = "hi-IN-SwaraNeural"
+
+    # Voice Previews (pre-rendered clips, missing ones synthesized once)
+    VOICE_PREVIEW_DIR: str = "voice_previews"
+    VOICE_PREVIEW_TEXT: str = "Hello! This is how I sound. Let's create something amazing together."
+    VOICE_PREVIEW_MAX_AGE: int = 604800  # seconds (7 days)
+
+    # Input Preprocessing (EXIF orientation, face crop, resize before animation)
+    PREPROCESS_ENABLED: bool = True
+    PREPROCESS_FACE_MARGIN: float = 2.2  # crop width as a multiple of the face width
+    PREPROCESS_DETECT_MAX_SIDE: int = 1280  # detection runs on a downscaled copy
+    PREPROCESS_JPEG_QUALITY: int = 92
+    
+    # Face Enhancement (GFPGAN)
+    ENHANCE_UPSCALE: int = 2  # output scale; 1 = restore faces only and keep the input resolution
+    ENHANCE_BATCH_SIZE: int = 4  # faces per GFPGAN forward pass (memory vs throughput)
+    ENHANCE_PIPELINE_WORKERS: int = 1  # enhancement threads between the decoder and encoder
+    ENHANCE_PIPELINE_QUEUE: int = 4  # batches in flight between decode and encode (memory bound)
+    ENHANCE_ENCODER_PRESET: str = "veryfast"  # x264 preset: ultrafast (speed) ... slow (size)
+    ENHANCE_ENCODER_CRF: int = 23
+    ENHANCE_FACE_TRACKING: bool = True  # optical-flow landmark tracking between detections
+    ENHANCE_TRACK_KEYFRAME_INTERVAL: int = 30  # frames between forced full detections
+    ENHANCE_TRACK_MAX_ERROR: float = 0.05  # flow error (x eye distance) that forces re-detection
+    ENHANCE_TRACK_SMOOTHING: float = 0.6  # EMA weight of the newest landmarks (1.0 = off)
+    ENHANCE_PROCESSES: int = 1  # >1: parallel segment processes (CPU hosts; each holds its own model, ~1.5GB)
+    ENHANCE_PROCESS_THREADS: int = 0  # torch threads per process (0 = cores / processes)
+    ENHANCE_SEGMENT_SECONDS: float = 4.0  # target segment length; cuts land on the next keyframe
+    ENHANCE_BACKEND: str = "torch"  # "torch" or "onnx" (ONNX Runtime, CPU hosts)
+    ENHANCE_ONNX_DIR: Optional[str] = None  # exported models (default: next to GFPGAN_WEIGHTS)
+    ENHANCE_ONNX_QUANTIZE: bool = False  # int8 dynamic quantization (benchmark first: ConvInteger is slow on some CPUs)
+    ENHANCE_ONNX_THREADS: int = 0  # intra-op threads (0 = torch's thread count)
+    ENHANCE_DELTA_THRESHOLD: float = 2.0  # gray levels of face-crop change below which the last restored face is reused (0 = off)
     
     # Feature Flags
     ENABLE_LANDMARK_PREVIEW: bool = True
@@ -0,0 +1,145 @@
+"""
+Antigravity AI - Content-Addressed Disk Cache
+Size-bounded LRU file cache shared by every worker process on the host
+(entries are plain files; recency is the file mtime, writes are atomic renames)
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts) -> str:
+    """Stable SHA-256 key from JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hash_file(path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents (blocking; call via asyncio.to_thread)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    LRU file cache bounded by total bytes
+
+    - get() marks an entry as recently used (touches mtime)
+    - put_file() / writer() publish entries atomically, then evict
+      least-recently-used files until the directory fits `max_bytes`
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, suffix: str = ""):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "bytes_saved": 0,
+            "evictions": 0,
+        }
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached file for `key` (and bump its recency), or None"""
+        path = self.path_for(key)
+        try:
+            size = path.stat().st_size
+            os.utime(path)
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += size
+        return path
+
+    def get_any(self, keys: Iterable[str]) -> Optional[Tuple[str, Path]]:
+        """First cached (key, path) among `keys`; counts as one lookup"""
+        for key in keys:
+            path = self.path_for(key)
+            try:
+                size = path.stat().st_size
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += size
+            return key, path
+
+        self.stats["misses"] += 1
+        return None
+
+    def put_file(self, key: str, source_path: str) -> Path:
+        """Copy an existing file into the cache"""
+        with self.writer(key) as temp_path:
+            shutil.copyfile(source_path, temp_path)
+        return self.path_for(key)
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Path]:
+        """
+        Yield a temp path to fill; published atomically if the block succeeds,
+        discarded if it raises.
+        """
+        temp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            yield temp_path
+            os.replace(temp_path, self.path_for(key))
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        self.evict()
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob(f"*{self.suffix}"):
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+            if total <= self.max_bytes:
+                break
+
+        logger.info(f"Disk cache {self.cache_dir} evicted down to {total} bytes")
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,203 @@
+"""
+Shared result downloader
+Large buffered chunks written off the event loop, HTTP Range resume after
+a dropped connection, size / checksum verification, atomic publish
+(.part file + os.replace) so readers never see a truncated file
+"""
+import asyncio
+import logging
+import os
+import random
+import shutil
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from core.config import settings
+from core.disk_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Disconnects / stalls worth resuming from; HTTP errors are handled by status
+_RESUMABLE_ERRORS = (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class DownloadError(RuntimeError):
+    """Download failed permanently (HTTP error, retries exhausted, verification failed)"""
+
+
+async def download_file(
+    url: str,
+    output_path: str,
+    session: Optional[aiohttp.ClientSession] = None,
+    timeout: Optional[aiohttp.ClientTimeout] = None,
+    expected_size: Optional[int] = None,
+    expected_sha256: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    max_retries: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    allow_local: bool = False
+) -> Dict:
+    """
+    Download an http(s) `url` to `output_path`
+
+    With `allow_local`, an existing local path is copied instead (Gradio
+    clients hand back local temp files); otherwise it is rejected.
+
+    Returns dict with path, bytes, attempts and resumed (bytes recovered via Range).
+    Raises DownloadError on failure; no partial output is left behind.
+    """
+    local = allow_local and os.path.exists(url)
+    if not local and urlparse(url).scheme not in ("http", "https"):
+        raise DownloadError(f"Refusing to download non-http(s) URL: {url}")
+
+    part_path = f"{output_path}.part"
+    max_retries = settings.DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+
+    try:
+        if local:
+            await asyncio.to_thread(shutil.copyfile, url, part_path)
+            result = {"path": output_path, "bytes": os.path.getsize(part_path), "attempts": 1, "resumed": 0}
+        else:
+            result = await _download_http(
+                url, part_path, session, timeout, headers or {}, max_retries, chunk_size
+            )
+            result["path"] = output_path
+
+        await _verify(part_path, expected_size, expected_sha256)
+        os.replace(part_path, output_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    if result["resumed"]:
+        logger.info(f"📥 Download resumed after disconnect ({result['resumed']} bytes kept, {result['attempts']} attempts)")
+    return result
+
+
+async def _download_http(
+    url: str,
+    part_path: str,
+    session: Optional[aiohttp.ClientSession],
+    timeout: Optional[aiohttp.ClientTimeout],
+    headers: Dict[str, str],
+    max_retries: int,
+    chunk_size: int
+) -> Dict:
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+    timeout = timeout or aiohttp.ClientTimeout(
+        total=None,
+        connect=settings.DOWNLOAD_CONNECT_TIMEOUT,
+        sock_read=settings.DOWNLOAD_READ_TIMEOUT
+    )
+
+    offset = 0
+    total = None
+    validator = None  # ETag / Last-Modified of the first response, for If-Range
+    resumed = 0
+    attempt = 0
+
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                attempt += 1
+                request_headers = dict(headers)
+                if offset:
+                    request_headers["Range"] = f"bytes={offset}-"
+                    if validator:
+                        request_headers["If-Range"] = validator
+
+                try:
+                    async with session.get(url, headers=request_headers, timeout=timeout) as resp:
+                        if resp.status == 416 and total is not None and offset >= total:
+                            break  # everything already on disk
+
+                        if resp.status == 206 and offset:
+                            start, total = _parse_content_range(resp.headers.get("Content-Range"))
+                            if start != offset:
+                                raise DownloadError(f"Server resumed at byte {start}, expected {offset}")
+                            resumed += offset
+                        elif resp.status == 200:
+                            if offset:
+                                # Range ignored or resource changed: start over
+                                logger.warning("Server ignored Range request - restarting download")
+                                offset = 0
+                                await asyncio.to_thread(_rewind, f)
+                            total = resp.content_length
+                            validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+                        elif resp.status in (408, 429) or resp.status >= 500:
+                            raise aiohttp.ClientResponseError(
+                                resp.request_info, resp.history, status=resp.status, message=resp.reason or ""
+                            )
+                        else:
+                            raise DownloadError(f"Download failed: HTTP {resp.status}")
+
+                        buffer = bytearray()
+                        try:
+                            async for data in resp.content.iter_chunked(chunk_size):
+                                buffer += data
+                                if len(buffer) >= chunk_size:
+                                    await asyncio.to_thread(f.write, buffer)
+                                    offset += len(buffer)
+                                    buffer = bytearray()
+                        finally:
+                            # Keep what arrived before a disconnect so the next attempt resumes after it
+                            if buffer:
+                                await asyncio.to_thread(f.write, buffer)
+                                offset += len(buffer)
+
+                    if total is None or offset >= total:
+                        break
+                    raise aiohttp.ClientPayloadError(f"Connection closed at {offset}/{total} bytes")
+
+                except (aiohttp.ClientResponseError, *_RESUMABLE_ERRORS) as e:
+                    if attempt > max_retries:
+                        raise DownloadError(f"Download failed after {attempt} attempts: {e}") from e
+                    delay = random.uniform(0, min(settings.DOWNLOAD_BACKOFF_MAX, 0.5 * 2 ** attempt))
+                    logger.warning(
+                        f"⚠️ Download interrupted at {offset} bytes ({type(e).__name__}: {e}) - "
+                        f"resuming in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+
+            await asyncio.to_thread(f.flush)
+    finally:
+        if own_session:
+            await session.close()
+
+    if total is not None and offset != total:
+        raise DownloadError(f"Size mismatch: got {offset} bytes, expected {total}")
+
+    return {"bytes": offset, "attempts": attempt, "resumed": resumed}
+
+
+def _rewind(f):
+    f.seek(0)
+    f.truncate()
+
+
+def _parse_content_range(value: Optional[str]):
+    """'bytes 100-999/1000' -> (100, 1000); total None when '*'"""
+    try:
+        unit_range, _, total = value.partition("/")
+        start = int(unit_range.split()[1].split("-")[0])
+        return start, (None if total.strip() == "*" else int(total))
+    except (AttributeError, IndexError, ValueError):
+        raise DownloadError(f"Invalid Content-Range: {value!r}")
+
+
+async def _verify(path: str, expected_size: Optional[int], expected_sha256: Optional[str]):
+    size = os.path.getsize(path)
+    if size == 0:
+        raise DownloadError("Downloaded file is empty")
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"Size mismatch: got {size} bytes, expected {expected_size}")
+    if expected_sha256:
+        digest = await asyncio.to_thread(hash_file, path)
+        if digest != expected_sha256.lower():
+            raise DownloadError(f"Checksum mismatch: got {digest[:12]}, expected {expected_sha256[:12]}")
@@ -0,0 +1,90 @@
+"""
+Shared cross-process state (SQLite, WAL mode)
+Small key tables every uvicorn worker on the host reads and writes,
+e.g. circuit breaker state, so one worker's discovery applies to all
+"""
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStateDB:
+    """
+    One SQLite connection per process (re-opened after fork)
+
+    Writes that read-then-update should use `transaction()`, which takes
+    the database write lock up front (BEGIN IMMEDIATE) so concurrent
+    workers serialize instead of racing.
+
+    Callers run on the event loop, so the busy timeout is short: under
+    contention they get sqlite3.OperationalError and must fail open.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 0.1):
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        self._conn = None
+        self._pid = None
+        self._lock = threading.RLock()
+        self._schema = []
+
+    def register_schema(self, ddl: str):
+        """Add CREATE TABLE IF NOT EXISTS statements, applied on (re)connect"""
+        with self._lock:
+            self._schema.append(ddl)
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.executescript(ddl)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout,
+            isolation_level=None,  # autocommit; transactions are explicit
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for ddl in self._schema:
+            conn.executescript(ddl)
+
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Exclusive read-modify-write across threads and processes"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            self._connect().execute(sql, params)
+
+
+# Global instance
+shared_state = SharedStateDB(settings.SHARED_STATE_DB, busy_timeout=settings.SHARED_STATE_BUSY_TIMEOUT)
@@ -1,13 +1,29 @@
-"""Engines module exports"""
-from .audio_synthesizer import audio_synthesizer, AudioSynthesizer
-from .animator import animator, Animator
-from .enhancer import enhancer, FaceEnhancer
-
-__all__ = [
-    'audio_synthesizer',
-    'AudioSynthesizer',
-    'animator',
-    'Animator',
-    'enhancer',
-    'FaceEnhancer'
-]
+"""
+Engines module exports
+
+Resolved lazily, so importing one engine (e.g. engines.enhancer in the
+enhancement worker processes) doesn't build every other engine and its models.
+Application code imports the instances from their own modules; a submodule
+imported before its instance is looked up here shadows the instance name.
+"""
+import importlib
+
+_EXPORTS = {
+    'audio_synthesizer': ('.audio_synthesizer', 'audio_synthesizer'),
+    'AudioSynthesizer': ('.audio_synthesizer', 'AudioSynthesizer'),
+    'animator': ('.animator', 'animator'),
+    'Animator': ('.animator', 'Animator'),
+    'enhancer': ('.enhancer', 'enhancer'),
+    'FaceEnhancer': ('.enhancer', 'FaceEnhancer'),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value  # replaces the submodule the import just bound to this name
+    return value
@@ -1,59 +1,97 @@
 """
 Antigravity AI - Animation Engine
-Supports multiple engines: HeyGen (production), LivePortrait (free/unreliable), SadTalker (local)
+Supports multiple engines: HeyGen (production), LivePortrait (free/unreliable), Local CPU (offline)
+Engine order is decided per request from live health scores (see engine_registry)
 """
 import logging
 import asyncio
-from typing import Dict, Optional
+import os
+import shutil
+import time
+import wave
+from typing import Dict, List, Optional
 from pathlib import Path
 
 from core.config import settings
+from core.disk_cache import DiskCache, hash_file, make_cache_key
+from engines.engine_registry import EngineRegistry, EngineCapabilities
 
 logger = logging.getLogger(__name__)
 
 
 class Animator:
     """
-    Multi-Engine Animation Wrapper
-    
+    Multi-Engine Animation Router
+
     Supports:
     - HeyGen API (recommended): Reliable, paid, production-ready
-    - LivePortrait (fallback): Free, unreliable, HuggingFace Spaces
-    - SadTalker (future): Local inference, requires GPU
+    - LivePortrait: Free, unreliable, HuggingFace Spaces
+    - Local CPU (last resort): Offline audio-energy driven warp
     """
-    
+
     def __init__(self):
         self.engine_name = settings.ANIMATION_ENGINE
-        self.primary_engine = None
-        self.fallback_engine = None
-        
+        self.registry = EngineRegistry(preferred=self.engine_name)
+        self.hedge_stats = {
+            "hedged_requests": 0,      # secondary engine was started
+            "hedge_wins": 0,           # ...and finished first with a success
+            "primary_wins": 0,         # primary still won after the hedge started
+            "both_failed": 0,
+        }
+        self.result_cache = DiskCache(
+            settings.ANIMATION_CACHE_DIR, settings.ANIMATION_CACHE_MAX_BYTES, suffix=".mp4"
+        ) if settings.ANIMATION_CACHE_ENABLED else None
+
         # Initialize engines based on configuration
         self._initialize_engines()
-    
+
     def _initialize_engines(self):
-        """Initialize animation engines based on configuration"""
-        
-        if self.engine_name == "heygen":
-            try:
-                from engines.heygen_wrapper import heygen_engine
-                self.primary_engine = heygen_engine
-                logger.info("✅ Primary engine: HeyGen API")
-                
-                # Fallback to LivePortrait if HeyGen fails
-                from engines.sadtalker_wrapper import sadtalker_engine
-                self.fallback_engine = sadtalker_engine
-                logger.info("  Fallback engine: LivePortrait (HuggingFace)")
-                
-            except ImportError as e:
-                logger.error(f"Failed to load HeyGen engine: {e}")
-                self.engine_name = "liveportrait"
-        
-        if self.engine_name == "liveportrait":
+        """Register every usable animation engine with its capabilities"""
+
+        try:
+            from engines.heygen_wrapper import heygen_engine
+            if heygen_engine.is_available:
+                self.registry.register("heygen", heygen_engine, EngineCapabilities(
+                    modes=("real", "anime"),
+                    max_duration=300.0,
+                    cost_per_minute=1.0,  # 1 credit = 1 minute
+                    expected_latency=90.0,
+                    preferred_resolution=1024
+                ))
+        except ImportError as e:
+            logger.error(f"Failed to load HeyGen engine: {e}")
+
+        try:
             from engines.sadtalker_wrapper import sadtalker_engine
-            self.primary_engine = sadtalker_engine
-            logger.info("✅ Primary engine: LivePortrait (HuggingFace)")
-            logger.warning("⚠️ LivePortrait is unreliable. Consider using HeyGen for production.")
-    
+            self.registry.register("liveportrait", sadtalker_engine, EngineCapabilities(
+                modes=("real", "anime"),
+                max_duration=60.0,
+                cost_per_minute=0.0,
+                expected_latency=120.0,
+                preferred_resolution=512,  # crops the face to 512 internally
+                breaker_threshold=2,  # public Space: back off quickly and for longer
+                breaker_cooldown=300
+            ))
+            if self.engine_name == "liveportrait":
+                logger.warning("⚠️ LivePortrait is unreliable. Consider using HeyGen for production.")
+        except ImportError as e:
+            logger.error(f"Failed to load LivePortrait engine: {e}")
+
+        # Offline last resort: always renders a real (if simple) talking head
+        if settings.LOCAL_ANIMATION_ENABLED or self.engine_name == "local":
+            from engines.local_animator import local_talking_head_engine
+            self.registry.register("local", local_talking_head_engine, EngineCapabilities(
+                modes=("real", "anime"),
+                cost_per_minute=0.0,
+                expected_latency=10.0,
+                last_resort=self.engine_name != "local",
+                preferred_resolution=720
+            ))
+
+        if self.engine_name not in self.registry:
+            logger.warning(f"⚠️ Preferred engine '{self.engine_name}' is not available")
+        logger.info(f"✅ Animation router ready ({len(self.registry)} engines, preferred: {self.engine_name})")
+
     async def generate_animation(
         self,
         image_path: str,
@@ -65,7 +103,7 @@ class Animator:
     ) -> Dict:
         """
         Generate animated video from portrait + audio
-        
+
         Args:
             image_path: Static portrait image
             audio_path: Audio file
@@ -73,105 +111,295 @@ class Animator:
             pose_intensity: Animation intensity (0.0-1.5)
             fps: Frames per second
             options: Additional options (e.g. mode="anime")
-        
+
         Returns:
             dict with video_path, status, source, and metadata
         """
-        options = options or {}
-        is_anime = options.get("mode") == "anime"
-        
-        logger.info(f"🎬 Animation request: engine={self.engine_name}, anime={is_anime}")
-        
-        # Try primary engine
-        try:
-            if is_anime and hasattr(self.primary_engine, 'animate_anime_character'):
-                logger.info("Using anime animation mode")
-                result = await self.primary_engine.animate_anime_character(
-                    image_path=image_path,
-                    audio_path=audio_path,
-                    output_path=output_path,
-                    style=options.get("style", "anime")
+        options = {"pose_intensity": pose_intensity, "fps": fps, **(options or {})}
+        mode = options.get("mode", "real")
+        duration = self._audio_duration(audio_path)
+
+        candidates = self.registry.rank(mode, duration)
+        logger.info(
+            f"🎬 Animation request: mode={mode}, duration={duration}, "
+            f"order={[c.name for c in candidates]}"
+        )
+
+        cache_keys = {}
+        if self.result_cache is not None:
+            # An engine whose breaker is open still has valid cached results
+            cache_keys = await self._cache_keys(
+                image_path, audio_path, self.registry.capable(mode, duration), options
+            )
+        if cache_keys:
+            cached = await self._get_cached(cache_keys, output_path)
+            if cached is not None:
+                return cached
+
+        result = {
+            "video_path": None,
+            "status": "failed",
+            "source": "no_engine_available",
+            "error": f"No animation engine can serve mode={mode}"
+        }
+
+        remaining = list(candidates)
+        while remaining:
+            primary = remaining.pop(0)
+            hedge = self._pick_hedge(primary, remaining)
+
+            if hedge is not None:
+                result = await self._hedged_attempt(
+                    primary.name, hedge.name, image_path, audio_path, output_path, options
                 )
+                if result.get("hedge_started"):
+                    remaining.remove(hedge)
             else:
-                logger.info("Using standard animation mode")
-                result = await self.primary_engine.generate_video(
-                    image_path=image_path,
-                    audio_path=audio_path,
-                    output_path=output_path,
-                    options=options
-                )
-            
-            # Check if primary engine succeeded
+                result = await self._attempt(primary.name, image_path, audio_path, output_path, options)
+
             if result.get("status") == "success":
-                logger.info(f"✅ {self.engine_name} animation successful")
+                if result.get("engine") in cache_keys:
+                    await asyncio.to_thread(
+                        self.result_cache.put_file, cache_keys[result["engine"]], output_path
+                    )
                 return result
-            
-            # Primary engine returned graceful failure
-            logger.warning(f"⚠️ {self.engine_name} returned: {result.get('status')}")
-            
-            # Try fallback if available
-            if self.fallback_engine:
-                logger.info("Attempting fallback engine...")
-                return await self._try_fallback(image_path, audio_path, output_path, options)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ {self.engine_name} failed: {str(e)}")
-            
-            # Try fallback
-            if self.fallback_engine:
-                logger.info("Attempting fallback engine...")
-                return await self._try_fallback(image_path, audio_path, output_path, options)
-            
-            # No fallback available
+            logger.info("Attempting next engine...")
+
+        if candidates:
+            result = {**result, "source": "all_engines_failed"}
+        return result
+
+    def preferred_input_resolution(self, mode: str = "real") -> Optional[int]:
+        """Longest image side worth sending for this mode (None = no engine preference)"""
+        return self.registry.preferred_resolution(mode)
+
+    async def _cache_keys(self, image_path: str, audio_path: str, engines: List, options: Dict) -> Dict[str, str]:
+        """
+        Result-cache key per cacheable engine, in ranked order
+
+        Last-resort engines are free and fast, and their output should not
+        shadow a better engine's on later requests, so they are not cached.
+        """
+        try:
+            image_hash, audio_hash = await asyncio.gather(
+                asyncio.to_thread(hash_file, image_path),
+                asyncio.to_thread(hash_file, audio_path)
+            )
+        except OSError as e:
+            logger.warning(f"⚠️ Animation cache skipped: {e}")
+            return {}
+        mode = options.get("mode", "real")
+        return {
+            entry.name: make_cache_key(
+                "animation", image_hash, audio_hash, entry.name, mode,
+                options.get("style") if mode == "anime" else None,
+                round(float(options.get("pose_intensity", 1.0)), 3),
+                int(options.get("fps", 25))
+            )
+            for entry in engines
+            if not entry.capabilities.last_resort
+        }
+
+    async def _get_cached(self, cache_keys: Dict[str, str], output_path: str) -> Optional[Dict]:
+        """Copy a cached result to output_path (best-ranked engine first)"""
+        hit = self.result_cache.get_any(cache_keys.values())
+        if hit is None:
+            return None
+
+        key, cached_path = hit
+        engine = next(name for name, k in cache_keys.items() if k == key)
+        await asyncio.to_thread(shutil.copyfile, cached_path, output_path)
+        logger.info(f"♻️ Animation cache hit ({engine}) - engine call skipped")
+        return {
+            "video_path": output_path,
+            "status": "success",
+            "source": f"cache:{engine}",
+            "engine": engine,
+            "cached": True
+        }
+
+    def _pick_hedge(self, primary, remaining: List) -> Optional[object]:
+        """Next non-last-resort engine to hedge with, if the primary has a latency profile"""
+        if not settings.ANIMATION_HEDGING_ENABLED:
+            return None
+        if primary.health.latency_percentile(settings.ANIMATION_HEDGE_PERCENTILE) is None:
+            return None
+        for candidate in remaining:
+            if not candidate.capabilities.last_resort:
+                return candidate
+        return None
+
+    async def _hedged_attempt(
+        self,
+        primary_name: str,
+        hedge_name: str,
+        image_path: str,
+        audio_path: str,
+        output_path: str,
+        options: Dict
+    ) -> Dict:
+        """
+        Run the primary; if it hasn't finished by its latency percentile,
+        start the hedge engine in parallel. First success wins, the other
+        attempt is cancelled. Each attempt writes to its own file.
+        """
+        delay = self.registry.get(primary_name).health.latency_percentile(
+            settings.ANIMATION_HEDGE_PERCENTILE
+        )
+        base, ext = os.path.splitext(output_path)
+        paths = {
+            primary_name: f"{base}.{primary_name}{ext}",
+            hedge_name: f"{base}.{hedge_name}{ext}",
+        }
+
+        tasks = {
+            asyncio.ensure_future(
+                self._attempt(primary_name, image_path, audio_path, paths[primary_name], options)
+            ): primary_name
+        }
+
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        hedge_started = not done
+        if hedge_started:
+            logger.info(f"⏱️ {primary_name} slower than p{int(settings.ANIMATION_HEDGE_PERCENTILE * 100)} "
+                        f"({delay:.1f}s) - hedging with {hedge_name}")
+            self.hedge_stats["hedged_requests"] += 1
+            tasks[asyncio.ensure_future(
+                self._attempt(hedge_name, image_path, audio_path, paths[hedge_name], options)
+            )] = hedge_name
+
+        result = {}
+        winner = None
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.get("status") == "success":
+                        winner = tasks[task]
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is not None:
+            os.replace(paths[winner], output_path)
+            result = {**result, "video_path": output_path}
+            if hedge_started:
+                key = "hedge_wins" if winner == hedge_name else "primary_wins"
+                self.hedge_stats[key] += 1
+                logger.info(f"🏁 Hedged request won by {winner}")
+        elif hedge_started:
+            self.hedge_stats["both_failed"] += 1
+
+        for name, path in paths.items():
+            if name != winner and os.path.exists(path):
+                os.remove(path)
+
+        return {**result, "hedge_started": hedge_started}
+
+    async def _attempt(
+        self,
+        name: str,
+        image_path: str,
+        audio_path: str,
+        output_path: str,
+        options: Dict
+    ) -> Dict:
+        """Run one engine, time it and feed the outcome into its health score"""
+        entry = self.registry.get(name)
+        if not entry.health.can_attempt():
+            # Another worker holds the half-open probe (or the breaker just opened)
+            logger.info(f"⚡ {name} breaker open - skipping")
             return {
                 "video_path": None,
                 "status": "failed",
-                "source": self.engine_name,
+                "source": name,
+                "error": "circuit_breaker_open"
+            }
+
+        engine = entry.engine
+        start = time.monotonic()
+
+        try:
+            result = await self._run_engine(engine, image_path, audio_path, output_path, options)
+        except asyncio.CancelledError:
+            # Hedge loser: says nothing about the engine, but must not hold the probe lease
+            entry.health.release_probe()
+            raise
+        except Exception as e:
+            logger.error(f"❌ {name} failed: {str(e)}")
+            result = {
+                "video_path": None,
+                "status": "failed",
+                "source": name,
                 "error": str(e)
             }
-    
-    async def _try_fallback(
+
+        result = {**result, "engine": name}
+        success = result.get("status") == "success"
+        self.registry.record(name, success, time.monotonic() - start)
+
+        if success:
+            logger.info(f"✅ {name} animation successful")
+        else:
+            logger.warning(f"⚠️ {name} returned: {result.get('status')}")
+        return result
+
+    async def _run_engine(
         self,
+        engine,
         image_path: str,
         audio_path: str,
         output_path: str,
         options: Dict
     ) -> Dict:
-        """Try fallback engine"""
+        """Dispatch to an engine's anime or standard entry point"""
+        if options.get("mode") == "anime" and hasattr(engine, 'animate_anime_character'):
+            return await engine.animate_anime_character(
+                image_path=image_path,
+                audio_path=audio_path,
+                output_path=output_path,
+                style=options.get("style", "anime"),
+                options=options  # pose_intensity, fps, ...
+            )
+        return await engine.generate_video(
+            image_path=image_path,
+            audio_path=audio_path,
+            output_path=output_path,
+            options=options
+        )
+
+    @staticmethod
+    def _audio_duration(audio_path: str) -> Optional[float]:
+        """Duration from the WAV header (None if not a readable WAV)"""
         try:
-            is_anime = options.get("mode") == "anime"
-            
-            if is_anime and hasattr(self.fallback_engine, 'animate_anime_character'):
-                result = await self.fallback_engine.animate_anime_character(
-                    image_path=image_path,
-                    audio_path=audio_path,
-                    output_path=output_path,
-                    style=options.get("style", "anime")
-                )
-            else:
-                result = await self.fallback_engine.generate_video(
-                    image_path=image_path,
-                    audio_path=audio_path,
-                    output_path=output_path,
-                    options=options
-                )
-            
-            if result.get("status") == "success":
-                logger.info("✅ Fallback engine successful")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Fallback engine also failed: {str(e)}")
-            return {
-                "video_path": None,
-                "status": "failed",
-                "source": "all_engines_failed",
-                "error": f"Primary and fallback engines failed. Last error: {str(e)}"
-            }
-    
+            with wave.open(audio_path, "rb") as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        except Exception:
+            return None
+
+    def get_engine_health(self) -> Dict:
+        """Live routing state per engine plus hedging and result-cache counters"""
+        return {
+            "engines": self.registry.snapshot(),
+            "hedging": dict(self.hedge_stats),
+            "result_cache": self.result_cache.get_stats() if self.result_cache is not None else None,
+        }
+
+    async def close(self):
+        """Release engine resources (pooled HTTP sessions etc.) on shutdown"""
+        for name in self.registry.names():
+            engine = self.registry.get(name).engine
+            if hasattr(engine, "close"):
+                try:
+                    await engine.close()
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to close {name}: {e}")
+
     def clear_gpu_memory(self):
         """Clear GPU memory (no-op for API-based engines)"""
         pass
@@ -179,4 +407,3 @@ class Animator:
 
 # Global instance
 animator = Animator()
-
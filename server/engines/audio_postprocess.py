@@ -0,0 +1,222 @@
+"""
+Antigravity AI - Audio Post-Processing Stage
+Vectorized NumPy pipeline: decode → downmix → resample → trim silence → loudness normalize
+Decodes once via ffmpeg and works on a single float32 buffer (no pydub round-trips)
+"""
+import logging
+import os
+import shutil
+import subprocess
+import wave
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.signal import lfilter, resample_poly
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AudioPostProcessor:
+    """
+    Speech post-processing on raw NumPy sample arrays
+
+    Stages (all operate in place where the shape allows):
+    1. Downmix to mono (channel mean)
+    2. Polyphase resampling (Kaiser-windowed FIR, scipy.signal.resample_poly)
+    3. Leading/trailing silence trim (frame RMS gate + padding)
+    4. Loudness normalization to a target LUFS (ITU-R BS.1770 gated loudness)
+    """
+
+    BLOCK_SECONDS = 0.4      # BS.1770 gating block
+    BLOCK_OVERLAP = 0.75
+    ABSOLUTE_GATE = -70.0    # LUFS
+    RELATIVE_GATE = -10.0    # LU below ungated loudness
+    PEAK_CEILING = 0.891     # -1 dBFS
+
+    def __init__(
+        self,
+        sample_rate: Optional[int] = None,
+        target_lufs: Optional[float] = None,
+        trim_threshold_db: Optional[float] = None,
+        trim_padding_ms: Optional[int] = None
+    ):
+        self.sample_rate = sample_rate or settings.AUDIO_SAMPLE_RATE
+        self.target_lufs = target_lufs if target_lufs is not None else settings.AUDIO_TARGET_LUFS
+        self.trim_threshold_db = (
+            trim_threshold_db if trim_threshold_db is not None else settings.AUDIO_TRIM_THRESHOLD_DB
+        )
+        self.trim_padding_ms = (
+            trim_padding_ms if trim_padding_ms is not None else settings.AUDIO_TRIM_PADDING_MS
+        )
+
+    def process(self, input_path: str, output_path: str) -> dict:
+        """
+        Run the full stage on a file and write 16-bit PCM mono WAV
+
+        Returns:
+            dict with audio_path, duration, loudness_lufs, trimmed_seconds
+        """
+        samples, source_rate, channels = self.decode(input_path)
+        original_seconds = len(samples) / (source_rate * channels)
+
+        samples = self.downmix(samples, channels)
+        samples = self.resample(samples, source_rate, self.sample_rate)
+        samples = self.trim_silence(samples, self.sample_rate)
+        loudness = self.normalize_loudness(samples, self.sample_rate)
+
+        self.write_wav(samples, self.sample_rate, output_path)
+
+        duration = len(samples) / self.sample_rate
+        return {
+            "audio_path": output_path,
+            "duration": duration,
+            "loudness_lufs": loudness,
+            "trimmed_seconds": max(original_seconds - duration, 0.0)
+        }
+
+    def decode(self, input_path: str) -> Tuple[np.ndarray, int, int]:
+        """Decode any ffmpeg-readable file to interleaved float32 samples"""
+        if not shutil.which("ffprobe") or not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg/ffprobe not found")
+
+        probe = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-select_streams", "a:0",
+                "-show_entries", "stream=sample_rate,channels",
+                "-of", "default=noprint_wrappers=1:nokey=1", input_path
+            ],
+            check=True, capture_output=True, text=True
+        )
+        source_rate, channels = (int(v) for v in probe.stdout.split()[:2])
+
+        decoded = subprocess.run(
+            [
+                "ffmpeg", "-v", "error", "-i", input_path,
+                "-f", "f32le", "-acodec", "pcm_f32le", "-"
+            ],
+            check=True, capture_output=True
+        )
+        # bytearray keeps the view writable so later stages can work in place
+        samples = np.frombuffer(bytearray(decoded.stdout), dtype=np.float32)
+        return samples, source_rate, channels
+
+    @staticmethod
+    def downmix(samples: np.ndarray, channels: int) -> np.ndarray:
+        """Interleaved multi-channel → mono"""
+        if channels <= 1:
+            return samples
+        usable = len(samples) - (len(samples) % channels)
+        return samples[:usable].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+    @staticmethod
+    def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+        """Polyphase resampling with an anti-aliasing Kaiser FIR"""
+        if source_rate == target_rate:
+            return samples
+        divisor = np.gcd(source_rate, target_rate)
+        up, down = target_rate // divisor, source_rate // divisor
+        resampled = resample_poly(samples, up, down, window=("kaiser", 5.0))
+        return resampled.astype(np.float32, copy=False)
+
+    def trim_silence(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Drop leading/trailing frames whose RMS is below the threshold (returns a view)"""
+        frame = max(int(sample_rate * 0.02), 1)  # 20 ms frames
+        n_frames = len(samples) // frame
+        if n_frames == 0:
+            return samples
+
+        frames = samples[:n_frames * frame].reshape(n_frames, frame)
+        rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame)
+        rms_db = 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+        voiced = np.flatnonzero(rms_db > self.trim_threshold_db)
+        if len(voiced) == 0:
+            return samples
+
+        padding = int(sample_rate * self.trim_padding_ms / 1000)
+        start = max(voiced[0] * frame - padding, 0)
+        end = min((voiced[-1] + 1) * frame + padding, len(samples))
+        return samples[start:end]
+
+    def measure_loudness(self, samples: np.ndarray, sample_rate: int) -> float:
+        """Integrated loudness (LUFS) per ITU-R BS.1770-4, mono"""
+        weighted = self._k_weight(samples, sample_rate)
+
+        block = int(self.BLOCK_SECONDS * sample_rate)
+        step = max(int(block * (1.0 - self.BLOCK_OVERLAP)), 1)
+        if len(weighted) < block:
+            block = step = len(weighted)
+        if block == 0:
+            return float("-inf")
+
+        # Mean square per gating block via cumulative sum (fully vectorized)
+        energy = np.concatenate(([0.0], np.cumsum(np.square(weighted, dtype=np.float64))))
+        starts = np.arange(0, len(weighted) - block + 1, step)
+        block_power = (energy[starts + block] - energy[starts]) / block
+        block_loudness = -0.691 + 10.0 * np.log10(np.maximum(block_power, 1e-12))
+
+        gated = block_power[block_loudness > self.ABSOLUTE_GATE]
+        if len(gated) == 0:
+            return float("-inf")
+
+        relative_gate = -0.691 + 10.0 * np.log10(gated.mean()) + self.RELATIVE_GATE
+        gated = block_power[block_loudness > max(relative_gate, self.ABSOLUTE_GATE)]
+        if len(gated) == 0:
+            return float("-inf")
+
+        return float(-0.691 + 10.0 * np.log10(gated.mean()))
+
+    def normalize_loudness(self, samples: np.ndarray, sample_rate: int) -> float:
+        """Scale samples in place to the target LUFS (peak-limited to -1 dBFS)"""
+        loudness = self.measure_loudness(samples, sample_rate)
+        if not np.isfinite(loudness):
+            return loudness
+
+        gain = 10.0 ** ((self.target_lufs - loudness) / 20.0)
+        peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+        if peak * gain > self.PEAK_CEILING:
+            gain = self.PEAK_CEILING / peak
+
+        np.multiply(samples, np.float32(gain), out=samples)
+        return loudness + 20.0 * np.log10(gain)
+
+    @staticmethod
+    def _k_weight(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """BS.1770 K-weighting (high shelf + RLB high-pass), designed for any sample rate"""
+        # Stage 1: high shelf (+4 dB @ ~1.5 kHz)
+        gain_db, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+        k = np.tan(np.pi * fc / sample_rate)
+        vh = 10.0 ** (gain_db / 20.0)
+        vb = vh ** 0.4996667741545416
+        a0 = 1.0 + k / q + k * k
+        b_shelf = [(vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+        a_shelf = [1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+        # Stage 2: RLB high-pass (~38 Hz)
+        q, fc = 0.5003270373238773, 38.13547087602444
+        k = np.tan(np.pi * fc / sample_rate)
+        a0 = 1.0 + k / q + k * k
+        b_hp = [1.0, -2.0, 1.0]
+        a_hp = [1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+        return lfilter(b_hp, a_hp, lfilter(b_shelf, a_shelf, samples))
+
+    @staticmethod
+    def write_wav(samples: np.ndarray, sample_rate: int, output_path: str):
+        """Write mono float samples as 16-bit PCM WAV"""
+        np.clip(samples, -1.0, 1.0, out=samples)
+        pcm = (samples * 32767.0).astype("<i2")
+
+        temp_path = f"{output_path}.tmp"
+        with wave.open(temp_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        os.replace(temp_path, output_path)
+
+
+# Global instance
+audio_postprocessor = AudioPostProcessor()
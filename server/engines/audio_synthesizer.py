@@ -4,7 +4,6 @@ Multi-engine TTS with FREE high-quality voices (Edge-TTS, Coqui XTTS v2)
 Matches premium quality at ~90% fidelity
 """
 import asyncio
-import edge_tts
 try:
     from TTS.api import TTS
     COQUI_AVAILABLE = True
@@ -13,17 +12,27 @@ except ImportError:
     COQUI_AVAILABLE = False
     
 from pydub import AudioSegment
+import hashlib
 import os
-from typing import Optional, Literal
+import re
+import shutil
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Literal, Tuple
 from langdetect import detect
 import logging
 
 from core.config import settings, get_voice_config, get_language_voice
+from core.disk_cache import DiskCache, make_cache_key
+from engines.audio_postprocess import audio_postprocessor
+from engines.tts_client import tts_client
 import static_ffmpeg
 static_ffmpeg.add_paths()
 
 logger = logging.getLogger(__name__)
 
+# voice_id is the SHA-256 of the reference audio; anything else never touches the filesystem
+_VOICE_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
 
 class AudioSynthesizer:
     """
@@ -37,6 +46,13 @@ class AudioSynthesizer:
         self.coqui_tts_enabled = settings.USE_COQUI_TTS and COQUI_AVAILABLE
         self.coqui_model = None
         
+        # Cloned voices: voice_id (reference content hash) → (gpt_cond_latent, speaker_embedding)
+        self.voice_clone_dir = Path(settings.VOICE_CLONE_DIR)
+        self._speaker_latents: Dict[str, Tuple] = {}
+        
+        # Edge-TTS output cache (shared by /tts/preview and full generation)
+        self.tts_cache = DiskCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES, suffix=".mp3")
+        
         # Preload Coqui model if enabled
         if self.coqui_tts_enabled:
             self._load_coqui_model()
@@ -59,7 +75,8 @@ class AudioSynthesizer:
         output_path: str,
         archetype: str = "narrator_male",
         language: Optional[str] = None,
-        engine: Literal["auto", "edge-tts", "coqui"] = "auto"
+        engine: Literal["auto", "edge-tts", "coqui"] = "auto",
+        voice_id: Optional[str] = None
     ) -> dict:
         """
         Synthesize speech from text
@@ -70,20 +87,17 @@ class AudioSynthesizer:
             archetype: Voice archetype (philosopher, storyteller, innovator, etc.)
             language: Language code (auto-detected if None)
             engine: Preferred TTS engine
+            voice_id: Cloned voice from register_voice() (forces Coqui XTTS)
         
         Returns:
             dict with audio_path, duration, language, voice_used
         """
-        # Auto-detect language
-        if language is None:
-            try:
-                language = detect(text)
-                logger.info(f"Detected language: {language}")
-            except:
-                language = "en"
+        language = self._detect_language(text, language)
         
         # Select engine
-        if engine == "auto":
+        if voice_id:
+            engine = "coqui"
+        elif engine == "auto":
             # Use Edge-TTS for most cases (fast, high quality)
             # Use Coqui for voice cloning or when Edge-TTS doesn't support language
             engine = "edge-tts" if self.edge_tts_enabled else "coqui"
@@ -92,15 +106,57 @@ class AudioSynthesizer:
         if engine == "edge-tts" and self.edge_tts_enabled:
             result = await self._synthesize_edge_tts(text, output_path, archetype, language)
         elif engine == "coqui" and self.coqui_tts_enabled:
-            result = await self._synthesize_coqui(text, output_path, language)
+            result = await self._synthesize_coqui(text, output_path, language, voice_id)
         else:
             raise ValueError(f"No TTS engine available for: {engine}")
         
         # Normalize audio to WAV 16kHz mono (required for LivePortrait)
-        result["audio_path"] = self._normalize_audio(output_path)
+        processed = await self._postprocess_audio(output_path)
+        result["audio_path"] = processed["audio_path"]
+        if "duration" in processed:
+            result["duration"] = processed["duration"]
         
         return result
     
+    @staticmethod
+    def _detect_language(text: str, language: Optional[str]) -> str:
+        """Auto-detect language when not given"""
+        if language is not None:
+            return language
+        try:
+            language = detect(text)
+            logger.info(f"Detected language: {language}")
+        except:
+            language = "en"
+        return language
+    
+    def _resolve_edge_voice(self, archetype: str, language: str) -> dict:
+        """Voice/rate/pitch for an archetype, overridden by language if needed"""
+        # Copy so language overrides never leak into the shared archetype table
+        voice_config = dict(get_voice_config(archetype))
+        
+        # Override voice based on language if needed
+        if language.startswith("hi"):
+            voice_config["voice"] = settings.DEFAULT_VOICE_HINDI
+        elif language.startswith("en"):
+            # Keep archetype voice for English
+            pass
+        else:
+            # Fallback to language-specific voice
+            voice_config["voice"] = get_language_voice(language)
+        
+        return voice_config
+    
+    @staticmethod
+    def _edge_cache_key(text: str, voice_config: dict) -> str:
+        return make_cache_key(
+            "edge-tts",
+            text,
+            voice_config["voice"],
+            voice_config.get("rate", "+0%"),
+            voice_config.get("pitch", "+0Hz")
+        )
+    
     async def _synthesize_edge_tts(
         self, 
         text: str, 
@@ -112,31 +168,26 @@ class AudioSynthesizer:
         Synthesize using Edge-TTS (FREE, 85-90% premium quality)
         Uses best neural voices: AriaNeural, GuyNeural, SoniaNeural, etc.
         """
-        # Get voice configuration
-        voice_config = get_voice_config(archetype)
-        
-        # Override voice based on language if needed
-        if language.startswith("hi"):
-            voice_config["voice"] = settings.DEFAULT_VOICE_HINDI
-        elif language.startswith("en"):
-            # Keep archetype voice for English
-            pass
-        else:
-            # Fallback to language-specific voice
-            voice_config["voice"] = get_language_voice(language)
+        voice_config = self._resolve_edge_voice(archetype, language)
         
         logger.info(f"Edge-TTS: Using voice '{voice_config['voice']}' for archetype '{archetype}'")
         
-        # Create TTS communicate object
-        communicate = edge_tts.Communicate(
-            text=text,
-            voice=voice_config["voice"],
-            rate=voice_config.get("rate", "+0%"),
-            pitch=voice_config.get("pitch", "+0Hz")
-        )
+        cache_key = self._edge_cache_key(text, voice_config)
+        cached_path = self.tts_cache.get(cache_key)
         
-        # Generate audio
-        await communicate.save(output_path)
+        if cached_path:
+            logger.info("✓ Edge-TTS cache hit")
+            shutil.copyfile(cached_path, output_path)
+        else:
+            # Generate audio (rate-limited, retried on transient errors)
+            await tts_client.save(
+                text=text,
+                voice=voice_config["voice"],
+                output_path=output_path,
+                rate=voice_config.get("rate", "+0%"),
+                pitch=voice_config.get("pitch", "+0Hz")
+            )
+            self.tts_cache.put_file(cache_key, output_path)
         
         # Get audio duration (safe)
         try:
@@ -154,14 +205,55 @@ class AudioSynthesizer:
             "engine": "edge-tts"
         }
     
+    async def stream_edge_tts(
+        self,
+        text: str,
+        archetype: str = "narrator_male",
+        language: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream Edge-TTS MP3 chunks as they arrive (low time-to-first-byte)
+        
+        Served from the TTS cache when possible; otherwise the stream is
+        teed into the cache so a later synthesize() of the same text is a hit.
+        """
+        if not self.edge_tts_enabled:
+            raise ValueError("Edge-TTS is disabled")
+        
+        language = self._detect_language(text, language)
+        voice_config = self._resolve_edge_voice(archetype, language)
+        cache_key = self._edge_cache_key(text, voice_config)
+        
+        cached_path = self.tts_cache.get(cache_key)
+        if cached_path:
+            with open(cached_path, "rb") as f:
+                for block in iter(lambda: f.read(64 * 1024), b""):
+                    yield block
+            return
+        
+        with self.tts_cache.writer(cache_key) as temp_path:
+            with open(temp_path, "wb") as f:
+                async for chunk in tts_client.stream(
+                    text,
+                    voice_config["voice"],
+                    rate=voice_config.get("rate", "+0%"),
+                    pitch=voice_config.get("pitch", "+0Hz")
+                ):
+                    f.write(chunk)
+                    yield chunk
+    
     async def _synthesize_coqui(
         self,
         text: str,
         output_path: str,
-        language: str
+        language: str,
+        voice_id: Optional[str] = None
     ) -> dict:
         """
         Synthesize using Coqui XTTS v2 (FREE, near-premium quality with voice cloning)
+        
+        With `voice_id`, reuses the cached speaker latents instead of
+        re-conditioning on the reference clip.
         """
         logger.info("Coqui XTTS v2: Generating speech...")
         
@@ -187,12 +279,21 @@ class AudioSynthesizer:
         }
         coqui_lang = lang_map.get(language[:2], "en")
         
-        # Generate speech
-        self.coqui_model.tts_to_file(
-            text=text,
-            file_path=output_path,
-            language=coqui_lang
-        )
+        if voice_id:
+            gpt_cond_latent, speaker_embedding = self._load_speaker_latents(voice_id)
+            await asyncio.to_thread(
+                self._xtts_inference,
+                text, coqui_lang, gpt_cond_latent, speaker_embedding, output_path
+            )
+            voice_used = f"coqui-xtts-clone-{voice_id[:12]}"
+        else:
+            # Generate speech
+            self.coqui_model.tts_to_file(
+                text=text,
+                file_path=output_path,
+                language=coqui_lang
+            )
+            voice_used = f"coqui-xtts-{coqui_lang}"
         
         # Get audio duration (safe)
         try:
@@ -205,40 +306,144 @@ class AudioSynthesizer:
             "audio_path": output_path,
             "duration": duration,
             "language": language,
-            "voice_used": f"coqui-xtts-{coqui_lang}",
+            "voice_used": voice_used,
             "engine": "coqui"
         }
     
-    def _normalize_audio(self, audio_path: str) -> str:
+    async def register_voice(self, reference_path: str) -> dict:
+        """
+        Register a reference clip for voice cloning
+        
+        Speaker conditioning latents are computed once and persisted under
+        VOICE_CLONE_DIR, keyed by the SHA-256 of the clip. Registering the
+        same clip again (or after a restart) is a cache hit.
+        
+        Returns:
+            dict with voice_id and cached flag
+        """
+        if not self.coqui_tts_enabled:
+            raise ValueError("Voice cloning requires Coqui XTTS (USE_COQUI_TTS)")
+        
+        voice_id = await asyncio.to_thread(self._hash_file, reference_path)
+        
+        if voice_id in self._speaker_latents or self._latents_path(voice_id).exists():
+            logger.info(f"✓ Cloned voice already registered: {voice_id[:12]}")
+            return {"voice_id": voice_id, "cached": True}
+        
+        logger.info(f"Computing XTTS speaker latents for {reference_path}...")
+        await asyncio.to_thread(self._compute_speaker_latents, voice_id, reference_path)
+        logger.info(f"✓ Cloned voice registered: {voice_id[:12]}")
+        
+        return {"voice_id": voice_id, "cached": False}
+    
+    def has_voice(self, voice_id: str) -> bool:
+        """Check whether a cloned voice has been registered"""
+        if not self.is_valid_voice_id(voice_id):
+            return False
+        return voice_id in self._speaker_latents or self._latents_path(voice_id).exists()
+    
+    @staticmethod
+    def is_valid_voice_id(voice_id: str) -> bool:
+        return isinstance(voice_id, str) and _VOICE_ID_PATTERN.fullmatch(voice_id) is not None
+    
+    def _latents_path(self, voice_id: str) -> Path:
+        if not self.is_valid_voice_id(voice_id):
+            raise ValueError(f"Invalid voice_id: {voice_id!r}")
+        return self.voice_clone_dir / f"{voice_id}.pt"
+    
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _compute_speaker_latents(self, voice_id: str, reference_path: str):
+        """Run XTTS conditioning on the reference clip and persist the result"""
+        import torch
+        
+        xtts = self.coqui_model.synthesizer.tts_model
+        gpt_cond_latent, speaker_embedding = xtts.get_conditioning_latents(
+            audio_path=[reference_path]
+        )
+        
+        self.voice_clone_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self._latents_path(voice_id).with_suffix(f".{os.getpid()}.tmp")
+        torch.save(
+            {
+                "model": settings.COQUI_MODEL,
+                "gpt_cond_latent": gpt_cond_latent.cpu(),
+                "speaker_embedding": speaker_embedding.cpu(),
+            },
+            temp_path
+        )
+        os.replace(temp_path, self._latents_path(voice_id))
+        
+        self._speaker_latents[voice_id] = (gpt_cond_latent, speaker_embedding)
+    
+    def _load_speaker_latents(self, voice_id: str) -> Tuple:
+        """Fetch cached latents (memory first, then disk)"""
+        if voice_id in self._speaker_latents:
+            return self._speaker_latents[voice_id]
+        
+        path = self._latents_path(voice_id)
+        if not path.exists():
+            raise ValueError(f"Unknown cloned voice: {voice_id}")
+        
+        import torch
+        data = torch.load(path, map_location="cpu")
+        if data.get("model") != settings.COQUI_MODEL:
+            raise ValueError(f"Cloned voice {voice_id[:12]} was registered with another model")
+        
+        device = next(self.coqui_model.synthesizer.tts_model.parameters()).device
+        latents = (data["gpt_cond_latent"].to(device), data["speaker_embedding"].to(device))
+        self._speaker_latents[voice_id] = latents
+        return latents
+    
+    def _xtts_inference(
+        self,
+        text: str,
+        language: str,
+        gpt_cond_latent,
+        speaker_embedding,
+        output_path: str
+    ):
+        """XTTS inference from precomputed speaker latents (blocking)"""
+        import numpy as np
+        
+        xtts = self.coqui_model.synthesizer.tts_model
+        out = xtts.inference(text, language, gpt_cond_latent, speaker_embedding)
+        
+        wav = out["wav"]
+        if hasattr(wav, "cpu"):
+            wav = wav.cpu().numpy()
+        samples = np.asarray(wav, dtype=np.float32).reshape(-1)
+        
+        audio_postprocessor.write_wav(samples, xtts.config.audio.output_sample_rate, output_path)
+    
+    async def _postprocess_audio(self, audio_path: str) -> dict:
         """
-        Normalize audio to WAV 16kHz mono (required for LivePortrait)
+        Downmix, resample to 16kHz, trim silence and loudness-normalize (NumPy stage)
+        
+        Runs off the event loop. Returns the post-processing result, or a
+        passthrough result with the original path if the stage fails.
         """
+        normalized_path = os.path.splitext(audio_path)[0] + "_normalized.wav"
         try:
-            # Check if ffmpeg is available (simple check)
-            import shutil
-            if not shutil.which("ffmpeg"):
-                logger.warning("ffmpeg not found, skipping audio normalization")
-                return audio_path
-
-            audio = AudioSegment.from_file(audio_path)
-            
-            # Convert to mono
-            if audio.channels > 1:
-                audio = audio.set_channels(1)
-            
-            # Resample to 16kHz
-            audio = audio.set_frame_rate(16000)
-            
-            # Export as WAV
-            normalized_path = audio_path.replace(os.path.splitext(audio_path)[1], "_normalized.wav")
-            audio.export(normalized_path, format="wav")
-            
-            logger.info(f"✓ Audio normalized: {normalized_path}")
-            return normalized_path
+            result = await asyncio.to_thread(
+                audio_postprocessor.process, audio_path, normalized_path
+            )
+            logger.info(
+                f"✓ Audio normalized: {normalized_path} "
+                f"({result['duration']:.2f}s, {result['loudness_lufs']:.1f} LUFS, "
+                f"trimmed {result['trimmed_seconds']:.2f}s)"
+            )
+            return result
         
         except Exception as e:
             logger.warning(f"Audio normalization failed (using original): {e}")
-            return audio_path
+            return {"audio_path": audio_path}
     
     def get_available_voices(self, language: Optional[str] = None) -> list:
         """
@@ -9,52 +9,14 @@ from typing import Optional, Dict, List
 from gradio_client import Client
 import json
 import random
-import time
 from PIL import Image
 import io
 
 logger = logging.getLogger(__name__)
 
 from core.config import settings
-
-
-class AvatarGenerationCircuitBreaker:
-    """Circuit breaker for HF Space to prevent cascading failures"""
-    
-    def __init__(self, failure_threshold=3, timeout=60):
-        self.failure_count = 0
-        self.failure_threshold = failure_threshold
-        self.timeout = timeout
-        self.last_failure_time = 0
-        self.is_open = False
-    
-    def record_success(self):
-        """Reset on success"""
-        self.failure_count = 0
-        self.is_open = False
-    
-    def record_failure(self):
-        """Track failures and open circuit if needed"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        
-        if self.failure_count >= self.failure_threshold:
-            self.is_open = True
-            logger.warning(f"🔴 Circuit breaker OPEN - HF Space marked as unavailable")
-    
-    def can_attempt(self) -> bool:
-        """Check if we should attempt HF call"""
-        if not self.is_open:
-            return True
-        
-        # Auto-reset after timeout
-        if time.time() - self.last_failure_time > self.timeout:
-            logger.info("🔄 Circuit breaker auto-reset - retrying HF Space")
-            self.is_open = False
-            self.failure_count = 0
-            return True
-        
-        return False
+from core.circuit_breaker import CircuitBreaker
+from core.downloads import download_file
 
 
 class AvatarGenerator:
@@ -75,7 +37,7 @@ class AvatarGenerator:
         self.gallery_dir = Path(gallery_dir)
         self.sd_space_url = sd_space_url
         self.client = None
-        self.circuit_breaker = AvatarGenerationCircuitBreaker()
+        self.circuit_breaker = CircuitBreaker("avatar_sd_space", failure_threshold=3, timeout=60)
         
         # Create gallery directory
         self.gallery_dir.mkdir(parents=True, exist_ok=True)
@@ -259,16 +221,8 @@ class AvatarGenerator:
         }
     
     async def _download_image(self, url: str, output_path: str):
-        """Download image from URL"""
-        import aiohttp
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    with open(output_path, 'wb') as f:
-                        f.write(await response.read())
-                else:
-                    raise RuntimeError(f"Download failed: HTTP {response.status}")
+        """Download image from URL (or copy a local Gradio temp file)"""
+        await download_file(url, output_path, allow_local=True)
     
     def get_random_avatar(self) -> Optional[str]:
         """Get random avatar or placeholder"""
@@ -0,0 +1,197 @@
+"""
+Antigravity AI - Animation Engine Registry
+Engines declare capabilities; the router keeps live health per engine
+(EWMA latency, EWMA success rate, shared breaker state) and orders engines per request
+"""
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EngineCapabilities:
+    """Static facts an engine declares at registration"""
+    modes: Tuple[str, ...] = ("real", "anime")
+    max_duration: Optional[float] = None   # seconds of audio, None = unlimited
+    cost_per_minute: float = 0.0           # credits per output minute
+    expected_latency: float = 60.0         # seconds, prior for the EWMA
+    last_resort: bool = False              # only used once every other engine failed
+    preferred_resolution: Optional[int] = None  # longest input side (px) the engine benefits from
+    breaker_threshold: Optional[int] = None  # consecutive failures to open (default ENGINE_BREAKER_THRESHOLD)
+    breaker_cooldown: Optional[float] = None  # seconds before a probe (default ENGINE_BREAKER_COOLDOWN)
+
+
+class EngineHealth:
+    """
+    Live health of one engine, updated after every attempt
+
+    Latency/success EWMAs are per process; the breaker is shared across
+    workers (core/circuit_breaker) so an outage seen by one applies to all.
+    """
+
+    def __init__(self, name: str, capabilities: EngineCapabilities):
+        self.alpha = settings.ENGINE_HEALTH_EWMA_ALPHA
+        self.latency_ewma = capabilities.expected_latency
+        self.success_rate = 1.0  # optimistic until proven otherwise
+        self.attempts = 0
+        self.breaker = CircuitBreaker(
+            f"engine:{name}",
+            failure_threshold=capabilities.breaker_threshold or settings.ENGINE_BREAKER_THRESHOLD,
+            timeout=capabilities.breaker_cooldown or settings.ENGINE_BREAKER_COOLDOWN
+        )
+        # Recent successful latencies, for hedging thresholds
+        self.latencies = deque(maxlen=settings.ANIMATION_HEDGE_WINDOW)
+
+    def record(self, success: bool, latency: float):
+        self.attempts += 1
+        self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+        self.success_rate += self.alpha * ((1.0 if success else 0.0) - self.success_rate)
+
+        if success:
+            self.latencies.append(latency)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def is_routable(self) -> bool:
+        """Worth ranking (breaker closed, or due for a probe); claims nothing"""
+        return self.breaker.allows_attempt()
+
+    def can_attempt(self) -> bool:
+        """Claim the right to call the engine (the single probe when half-open)"""
+        return self.breaker.can_attempt()
+
+    def release_probe(self):
+        """Attempt cancelled before it finished: record nothing, free the probe"""
+        self.breaker.release_probe()
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """q-quantile (0-1) of recent successful latencies, None until enough samples"""
+        if len(self.latencies) < settings.ANIMATION_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        breaker = self.breaker.snapshot()
+        return {
+            "latency_ewma": round(self.latency_ewma, 2),
+            "success_rate": round(self.success_rate, 3),
+            "attempts": self.attempts,
+            "consecutive_failures": breaker["failure_count"],
+            "breaker": breaker["state"],
+        }
+
+
+@dataclass
+class RegisteredEngine:
+    name: str
+    engine: Any
+    capabilities: EngineCapabilities
+    health: EngineHealth = field(init=False)
+
+    def __post_init__(self):
+        self.health = EngineHealth(self.name, self.capabilities)
+
+
+class EngineRegistry:
+    """
+    Capability filter + health-scored ordering
+
+    Score (lower is better) is the expected seconds until a successful
+    result, plus the engine's credit cost converted to seconds:
+
+        latency_ewma / success_rate + cost_per_minute * minutes * COST_WEIGHT
+
+    The configured ANIMATION_ENGINE gets a preference multiplier so it leads
+    on a cold start; live health overrides it once data accumulates.
+    """
+
+    def __init__(self, preferred: Optional[str] = None):
+        self.preferred = preferred
+        self._engines: Dict[str, RegisteredEngine] = {}
+
+    def register(self, name: str, engine: Any, capabilities: EngineCapabilities):
+        self._engines[name] = RegisteredEngine(name, engine, capabilities)
+        logger.info(f"  Registered animation engine: {name} ({capabilities})")
+
+    def get(self, name: str) -> RegisteredEngine:
+        return self._engines[name]
+
+    def names(self) -> List[str]:
+        return list(self._engines)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._engines
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def rank(self, mode: str, duration: Optional[float] = None) -> List[RegisteredEngine]:
+        """Engines able to serve this request, best first (last-resort engines at the end)"""
+        ranked = []
+        for entry in self.capable(mode, duration):
+            if not entry.health.is_routable():
+                logger.info(f"  Skipping {entry.name}: breaker open")
+                continue
+            ranked.append(entry)
+        return ranked
+
+    def capable(self, mode: str, duration: Optional[float] = None) -> List[RegisteredEngine]:
+        """Engines whose capabilities fit the request, in rank order, whatever their breaker state"""
+        ranked, last_resort = [], []
+        for entry in self._engines.values():
+            caps = entry.capabilities
+            if mode not in caps.modes:
+                continue
+            if duration is not None and caps.max_duration is not None and duration > caps.max_duration:
+                continue
+            (last_resort if caps.last_resort else ranked).append(entry)
+
+        ranked.sort(key=lambda e: self.score(e, duration))
+        last_resort.sort(key=lambda e: self.score(e, duration))
+        return ranked + last_resort
+
+    def preferred_resolution(self, mode: str) -> Optional[int]:
+        """Largest preferred input size among engines that could serve `mode`"""
+        sizes = [
+            entry.capabilities.preferred_resolution
+            for entry in self._engines.values()
+            if mode in entry.capabilities.modes and entry.capabilities.preferred_resolution
+        ]
+        return max(sizes) if sizes else None
+
+    def score(self, entry: RegisteredEngine, duration: Optional[float] = None) -> float:
+        health = entry.health
+        expected = health.latency_ewma / max(health.success_rate, 0.05)
+
+        minutes = (duration or 60.0) / 60.0
+        expected += entry.capabilities.cost_per_minute * minutes * settings.ENGINE_COST_WEIGHT
+
+        if entry.name == self.preferred:
+            expected *= settings.ENGINE_PREFERENCE_BONUS
+        return expected
+
+    def record(self, name: str, success: bool, latency: float):
+        self._engines[name].health.record(success, latency)
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                **entry.health.snapshot(),
+                "score": round(self.score(entry), 2),
+                "modes": list(entry.capabilities.modes),
+                "max_duration": entry.capabilities.max_duration,
+                "cost_per_minute": entry.capabilities.cost_per_minute,
+                "last_resort": entry.capabilities.last_resort,
+                "preferred_resolution": entry.capabilities.preferred_resolution,
+            }
+            for name, entry in self._engines.items()
+        }
@@ -15,14 +15,111 @@ except ImportError:
 import cv2
 import numpy as np
 from pathlib import Path
+import asyncio
+import inspect
 import logging
-from typing import Optional
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
 
 from core.config import settings
+from engines.face_tracker import FaceTracker
+from engines.ffmpeg_writer import FFmpegVideoWriter
+from engines.frame_pipeline import run_frame_pipeline
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class FrameFaces:
+    """Faces found in one frame: alignment matrices, aligned crops, restored crops"""
+    affines: List[np.ndarray] = field(default_factory=list)
+    crops: List[np.ndarray] = field(default_factory=list)
+    restored: List[np.ndarray] = field(default_factory=list)
+
+
+class DeltaSkipper:
+    """
+    Reuses a restored face when its aligned crop barely changed
+    
+    Each face slot keeps a reference (crop signature + restored crop). A new
+    crop whose difference from the reference is below `threshold` (mean
+    absolute gray-level change of the most-changed 8x8 block, so a moving
+    mouth still counts) reuses the reference's restored crop instead of
+    running GFPGAN. Comparing against the last restored crop rather than
+    the previous frame stops slow drift from accumulating.
+    """
+    
+    SIGNATURE_SIZE = 64
+    BLOCK = 8
+    
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.faces = 0
+        self.skipped = 0
+        self._references = {}  # face slot -> (signature, restored crop)
+        self._lock = threading.Lock()
+    
+    @property
+    def skipped_ratio(self) -> float:
+        return self.skipped / self.faces if self.faces else 0.0
+    
+    def begin(self) -> dict:
+        """Snapshot of the references for one batch"""
+        with self._lock:
+            return dict(self._references)
+    
+    def match(self, references: dict, slot: int, crop: np.ndarray, pending_index: int):
+        """
+        Restored crop to reuse (an array, or the pending index of a crop
+        restored later in this batch), or None if `crop` must be restored
+        """
+        signature = self._signature(crop)
+        reference = references.get(slot)
+        with self._lock:
+            self.faces += 1
+            if reference is not None and self._distance(signature, reference[0]) < self.threshold:
+                self.skipped += 1
+                return reference[1]
+        references[slot] = (signature, pending_index)
+        return None
+    
+    def finish(self, references: dict, restored: List[Optional[np.ndarray]]):
+        """
+        Resolve this batch's pending references and publish them; a slot
+        whose restoration failed (None) keeps its previous reference
+        """
+        with self._lock:
+            resolved = {}
+            for slot, (signature, value) in references.items():
+                if isinstance(value, int):
+                    value = restored[value]
+                    if value is None:
+                        if slot in self._references:
+                            resolved[slot] = self._references[slot]
+                        continue
+                resolved[slot] = (signature, value)
+            self._references = resolved
+    
+    def _signature(self, crop: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (self.SIGNATURE_SIZE, self.SIGNATURE_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    
+    def _distance(self, a: np.ndarray, b: np.ndarray) -> float:
+        blocks = self.SIGNATURE_SIZE // self.BLOCK
+        diff = np.abs(a - b).reshape(blocks, self.BLOCK, blocks, self.BLOCK)
+        return float(diff.mean(axis=(1, 3)).max())
+
+
 class FaceEnhancer:
     """
     GFPGAN v1.4 wrapper for video enhancement
@@ -42,6 +139,13 @@ class FaceEnhancer:
             self.device = torch.device("cuda")
         
         self.enhancer = None
+        self._helper_lock = threading.Lock()  # GFPGANer.face_helper keeps per-image state
+        self._onnx = None  # onnxruntime.InferenceSession when ENHANCE_BACKEND == "onnx"
+        self._onnx_batch = 1
+        # StyleGAN noise injection on the torch path (the ONNX graph is always exported without it)
+        self.randomize_noise = True
+        self._pool = None  # segment worker processes (ENHANCE_PROCESSES > 1)
+        self._pool_lock = threading.Lock()
         logger.info(f"GFPGAN Enhancer initialized (Available: {GFPGAN_AVAILABLE})")
     
     def load_model(self):
@@ -64,7 +168,7 @@ class FaceEnhancer:
             # Initialize GFPGAN
             self.enhancer = GFPGANer(
                 model_path=str(weights_path),
-                upscale=2,  # 2x upscaling (512px → 1024px)
+                upscale=settings.ENHANCE_UPSCALE,  # 2: 512px → 1024px, 1: faces only, input resolution kept
                 arch='clean',
                 channel_multiplier=2,
                 bg_upsampler=None,  # Don't upscale background (prevents warping)
@@ -76,6 +180,88 @@ class FaceEnhancer:
         except Exception as e:
             logger.error(f"GFPGAN loading failed: {e}")
             self.enhancer = None
+            return
+        
+        if settings.ENHANCE_BACKEND == "onnx":
+            self.use_backend("onnx", quantize=settings.ENHANCE_ONNX_QUANTIZE)
+    
+    @property
+    def backend(self) -> str:
+        """Active face restoration backend ("torch" or "onnx")"""
+        return "onnx" if self._onnx is not None else "torch"
+    
+    def use_backend(self, backend: str, quantize: bool = False):
+        """
+        Switch face restoration between "torch" and "onnx" (ONNX Runtime, CPU)
+        
+        The ONNX generator is exported from the loaded model on first use
+        (optionally int8 dynamic-quantized) and cached next to the weights.
+        Falls back to torch if onnxruntime is missing or the export fails.
+        """
+        self._onnx = None
+        if backend != "onnx":
+            return
+        
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            logger.warning("onnxruntime not installed, using torch backend")
+            return
+        
+        batch = max(settings.ENHANCE_BATCH_SIZE, 1)
+        try:
+            model_path = self._export_onnx(batch, quantize)
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = settings.ENHANCE_ONNX_THREADS or torch.get_num_threads()
+            self._onnx = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+            self._onnx_batch = batch
+            logger.info(f"✓ GFPGAN ONNX Runtime backend ready ({model_path.name}, {options.intra_op_num_threads} threads)")
+        except Exception as e:
+            logger.error(f"GFPGAN ONNX backend failed, using torch: {e}")
+            self._onnx = None
+    
+    def _export_onnx(self, batch: int, quantize: bool) -> Path:
+        """Export (once) the GFPGAN generator with a fixed batch size; returns the model path"""
+        # Modulated convs use groups=batch, so the batch dimension cannot be dynamic
+        base = Path(settings.ENHANCE_ONNX_DIR or Path(settings.GFPGAN_WEIGHTS).parent)
+        fp32_path = base / f"{Path(settings.GFPGAN_WEIGHTS).stem}.b{batch}.onnx"
+        model_path = fp32_path.with_suffix(".int8.onnx") if quantize else fp32_path
+        if model_path.exists():
+            return model_path
+        base.mkdir(parents=True, exist_ok=True)
+        
+        if not fp32_path.exists():
+            logger.info(f"Exporting GFPGAN to ONNX (batch {batch})...")
+            generator = self.enhancer.gfpgan
+            
+            class Generator(torch.nn.Module):
+                def __init__(self):
+                    super().__init__()
+                    self.generator = generator
+                
+                def forward(self, x):
+                    # Fixed noise buffers: randomized noise would be baked into the graph
+                    return self.generator(x, return_rgb=False, randomize_noise=False)[0]
+            
+            # Legacy (TorchScript) exporter; torch >= 2.5 would default to dynamo
+            export_kwargs = {"opset_version": 17}
+            if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+                export_kwargs["dynamo"] = False
+            dummy = torch.zeros(batch, 3, 512, 512, device=next(generator.parameters()).device)
+            with _part_path(fp32_path) as part_path, torch.no_grad():
+                torch.onnx.export(
+                    Generator().eval(), dummy, part_path,
+                    input_names=["input"], output_names=["output"], **export_kwargs
+                )
+        
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            logger.info("Quantizing GFPGAN ONNX model to int8...")
+            with _part_path(model_path) as part_path:
+                quantize_dynamic(str(fp32_path), part_path, weight_type=QuantType.QInt8)
+        
+        return model_path
     
     def enhance_image(self, image_path: str, output_path: str, weight: float = 0.5) -> dict:
         """
@@ -130,7 +316,9 @@ class FaceEnhancer:
         video_path: str,
         output_path: str,
         weight: float = 0.5,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        preset: Optional[str] = None,
+        crf: Optional[int] = None
     ) -> dict:
         """
         Enhance video frame-by-frame
@@ -140,108 +328,416 @@ class FaceEnhancer:
             output_path: Output enhanced video path
             weight: Enhancement blending weight
             progress_callback: Function to call with progress (0-100)
+            preset: x264 preset (default ENHANCE_ENCODER_PRESET; faster = bigger file)
+            crf: x264 quality (default ENHANCE_ENCODER_CRF; lower = better/bigger)
         
         Returns:
             dict with enhanced_path, frame_count, resolution
         """
-        self.load_model()
-        
-        if self.enhancer is None:
-            logger.warning("GFPGAN not available, skipping video enhancement")
-            import shutil
-            shutil.copy(video_path, output_path)
-            return {"enhanced_path": output_path, "enhanced": False}
+        # Segment workers load their own models; the parent only needs one
+        # for the in-process path
+        segmented = settings.ENHANCE_PROCESSES > 1 and self._weights_available()
+        if not segmented:
+            self.load_model()
+            if self.enhancer is None:
+                return self._skip_video(video_path, output_path)
         
         logger.info(f"Enhancing video: {video_path}")
         
-        # Open video
+        loop = asyncio.get_running_loop()
+        
+        def report_progress(progress: int):
+            if progress_callback:
+                asyncio.run_coroutine_threadsafe(progress_callback(progress), loop)
+        
+        encoder = {
+            "preset": preset or settings.ENHANCE_ENCODER_PRESET,
+            "crf": settings.ENHANCE_ENCODER_CRF if crf is None else crf,
+        }
+        
+        stats = None
+        if segmented:
+            stats = await self._enhance_video_segmented(video_path, output_path, weight, encoder, report_progress)
+            if stats is None:
+                # Too short to split: enhance in this process after all
+                self.load_model()
+                if self.enhancer is None:
+                    return self._skip_video(video_path, output_path)
+        if stats is None:
+            # Decode / enhance / encode overlap on worker threads
+            stats = await asyncio.to_thread(
+                self._enhance_video_frames, video_path, output_path, weight, encoder, report_progress
+            )
+        logger.info(f"✓ Video enhanced: {output_path}")
+        
+        return {
+            "enhanced_path": output_path,
+            "enhanced": True,
+            **stats
+        }
+    
+    def _weights_available(self) -> bool:
+        """Whether the model can be loaded, without loading it"""
+        return self.enhancer is not None or (GFPGAN_AVAILABLE and Path(settings.GFPGAN_WEIGHTS).exists())
+    
+    def _skip_video(self, video_path: str, output_path: str) -> dict:
+        logger.warning("GFPGAN not available, skipping video enhancement")
+        shutil.copy(video_path, output_path)
+        return {"enhanced_path": output_path, "enhanced": False}
+    
+    def _enhance_video_frames(
+        self,
+        video_path: str,
+        output_path: str,
+        weight: float,
+        encoder: dict,
+        report_progress: Callable[[int], None],
+        audio: bool = True
+    ) -> dict:
+        """
+        Decoder thread -> enhancement worker(s) -> encoder (this thread)
+        
+        Batches of ENHANCE_BATCH_SIZE frames flow through bounded queues
+        (ENHANCE_PIPELINE_QUEUE batches in flight) in source order. Enhanced
+        frames are piped into a single libx264 encode that also copies the
+        source audio, so there is no intermediate file or second encode.
+        
+        With ENHANCE_FACE_TRACKING the decoder thread (which sees frames in
+        order) tracks landmarks between keyframes instead of running the
+        face detector on every frame. With ENHANCE_DELTA_THRESHOLD > 0,
+        faces that barely changed reuse the last restored crop.
+        
+        Returns:
+            dict with frame_count, resolution, face_detection_ratio and skipped_face_ratio
+        """
         cap = cv2.VideoCapture(video_path)
         fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        batch_size = max(settings.ENHANCE_BATCH_SIZE, 1)
+        tracker = None
+        if settings.ENHANCE_FACE_TRACKING:
+            tracker = FaceTracker(
+                self._detect_landmarks,
+                keyframe_interval=settings.ENHANCE_TRACK_KEYFRAME_INTERVAL,
+                max_error=settings.ENHANCE_TRACK_MAX_ERROR,
+                smoothing=settings.ENHANCE_TRACK_SMOOTHING
+            )
         
-        # Read first frame to get dimensions
-        ret, first_frame = cap.read()
-        if not ret:
-            raise ValueError("Failed to read video")
+        skipper = DeltaSkipper(settings.ENHANCE_DELTA_THRESHOLD) if settings.ENHANCE_DELTA_THRESHOLD > 0 else None
         
-        # Enhance first frame to get output dimensions
-        _, _, enhanced_first = self.enhancer.enhance(
-            first_frame,
-            has_aligned=False,
-            only_center_face=False,
-            paste_back=True,
-            weight=weight
-        )
-        h, w = enhanced_first.shape[:2]
-        
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        temp_output = output_path.replace('.mp4', '_temp.mp4')
-        out = cv2.VideoWriter(temp_output, fourcc, fps, (w, h))
-        
-        # Write enhanced first frame
-        out.write(enhanced_first)
-        
-        # Process remaining frames
-        frame_idx = 1
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Enhance frame
-            _, _, enhanced_frame = self.enhancer.enhance(
-                frame,
-                has_aligned=False,
-                only_center_face=False,
-                paste_back=True,
-                weight=weight
-            )
+        def read_batches():
+            while True:
+                frames = []
+                while len(frames) < batch_size:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    frames.append(frame)
+                if not frames:
+                    return
+                landmarks = [tracker.track(frame) for frame in frames] if tracker else None
+                yield frames, landmarks
+        
+        state = {"writer": None, "frames": 0, "size": None}
+        
+        def write_batch(enhanced_frames: List[np.ndarray]):
+            if state["writer"] is None:
+                # Create video writer from the first enhanced frame's dimensions
+                h, w = enhanced_frames[0].shape[:2]
+                state["writer"] = FFmpegVideoWriter(
+                    output_path, w, h, fps,
+                    audio_path=video_path if audio else None,
+                    preset=encoder["preset"],
+                    crf=encoder["crf"],
+                    audio_codec="copy"
+                )
+                state["size"] = (w, h)
             
-            out.write(enhanced_frame)
+            for enhanced_frame in enhanced_frames:
+                state["writer"].write(enhanced_frame)
             
             # Progress
-            frame_idx += 1
-            if frame_idx % 10 == 0:
+            previous_idx = state["frames"]
+            state["frames"] += len(enhanced_frames)
+            frame_idx = state["frames"]
+            if frame_idx // 10 != previous_idx // 10 and total_frames > 0:
                 progress = int((frame_idx / total_frames) * 100)
                 logger.info(f"  Enhanced {frame_idx}/{total_frames} frames ({progress}%)")
-                
-                if progress_callback:
-                    await progress_callback(progress)
-        
-        cap.release()
-        out.release()
-        
-        # Add audio from original video
-        import subprocess
-        cmd = [
-            'ffmpeg', '-y',
-            '-i', temp_output,
-            '-i', video_path,
-            '-c:v', 'libx264',
-            '-c:a', 'copy',
-            '-map', '0:v:0',
-            '-map', '1:a:0?',
-            output_path
-        ]
+                report_progress(progress)
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
-            logger.info(f"✓ Video enhanced: {output_path}")
-            
-            # Clean up
-            Path(temp_output).unlink()
-        except subprocess.CalledProcessError as e:
-            logger.error(f"FFmpeg error: {e.stderr.decode()}")
+            run_frame_pipeline(
+                read_batches(),
+                lambda batch: self.enhance_frames(
+                    batch[0], weight=weight, batch_size=batch_size, landmarks=batch[1], skipper=skipper
+                ),
+                write_batch,
+                workers=settings.ENHANCE_PIPELINE_WORKERS,
+                max_in_flight=settings.ENHANCE_PIPELINE_QUEUE
+            )
+            if state["writer"] is None:
+                raise ValueError("Failed to read video")
+            state["writer"].close()
+        except BaseException:
+            if state["writer"] is not None:
+                state["writer"].abort()
+                Path(output_path).unlink(missing_ok=True)
             raise
+        finally:
+            cap.release()
         
+        w, h = state["size"]
+        detection_ratio = tracker.detection_ratio if tracker else 1.0
+        skipped_ratio = skipper.skipped_ratio if skipper else 0.0
+        if tracker:
+            logger.info(f"  Face detector ran on {tracker.detections}/{tracker.frames} frames")
+        if skipper:
+            logger.info(f"  Reused restored face for {skipper.skipped}/{skipper.faces} faces ({skipped_ratio:.0%})")
         return {
-            "enhanced_path": output_path,
-            "frame_count": total_frames,
+            "frame_count": state["frames"],
             "resolution": f"{w}x{h}",
-            "enhanced": True
+            "face_detection_ratio": round(detection_ratio, 3),
+            "skipped_face_ratio": round(skipped_ratio, 3)
         }
     
+    async def _enhance_video_segmented(
+        self,
+        video_path: str,
+        output_path: str,
+        weight: float,
+        encoder: dict,
+        report_progress: Callable[[int], None]
+    ) -> Optional[dict]:
+        """
+        Enhance keyframe-aligned segments in parallel worker processes
+        
+        The video stream is cut without re-encoding into ~ENHANCE_SEGMENT_SECONDS
+        segments, each is enhanced by a pool process with its own model and
+        a capped torch thread count, and the encoded segments are joined
+        losslessly with the concat demuxer while muxing the source audio.
+        
+        Returns:
+            Aggregated stats, or None if the video is too short to split
+        """
+        work_dir = tempfile.mkdtemp(prefix="enhance_", dir=str(Path(output_path).parent))
+        try:
+            segments = await asyncio.to_thread(_split_segments, video_path, work_dir)
+            if len(segments) < 2:
+                return None
+            
+            logger.info(f"  Enhancing {len(segments)} segments in {settings.ENHANCE_PROCESSES} processes")
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            outputs = [os.path.join(work_dir, f"enhanced_{i:04d}.mp4") for i in range(len(segments))]
+            completed = 0
+            
+            async def run_segment(segment: str, segment_output: str) -> dict:
+                nonlocal completed
+                result = await loop.run_in_executor(pool, _enhance_segment, segment, segment_output, weight, encoder)
+                completed += 1
+                report_progress(int(completed / len(segments) * 100))
+                return result
+            
+            tasks = [asyncio.ensure_future(run_segment(seg, out)) for seg, out in zip(segments, outputs)]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException as e:
+                for task in tasks:
+                    task.cancel()
+                if isinstance(e, BrokenProcessPool):
+                    logger.error("❌ Enhancement worker process died (out of memory?) - pool will be restarted")
+                    self.close()
+                raise
+            
+            await asyncio.to_thread(_concat_segments, outputs, video_path, output_path, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        frame_count = sum(result["frame_count"] for result in results)
+        
+        def weighted(key: str) -> float:
+            return round(sum(r[key] * r["frame_count"] for r in results) / max(frame_count, 1), 3)
+        
+        return {
+            "frame_count": frame_count,
+            "resolution": results[0]["resolution"],
+            "face_detection_ratio": weighted("face_detection_ratio"),
+            "skipped_face_ratio": weighted("skipped_face_ratio"),
+            "segments": len(segments)
+        }
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Persistent segment worker pool (models stay loaded between videos)"""
+        with self._pool_lock:
+            if self._pool is None:
+                processes = settings.ENHANCE_PROCESSES
+                threads = settings.ENHANCE_PROCESS_THREADS or max((os.cpu_count() or 1) // processes, 1)
+                # spawn: forking a process that already runs torch / uvicorn threads can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segment_worker,
+                    initargs=(threads,)
+                )
+                logger.info(f"✓ Enhancement pool started ({processes} processes x {threads} threads)")
+            return self._pool
+    
+    def enhance_frames(
+        self,
+        frames: List[np.ndarray],
+        weight: float = 0.5,
+        batch_size: Optional[int] = None,
+        landmarks: Optional[List[List[np.ndarray]]] = None,
+        skipper: Optional[DeltaSkipper] = None
+    ) -> List[np.ndarray]:
+        """
+        Enhance several frames with batched restoration
+        
+        Detect + align every frame, restore all face crops in stacked
+        forward passes of `batch_size`, then paste back per frame.
+        Same output as calling GFPGANer.enhance() frame by frame.
+        Pass per-frame `landmarks` (e.g. from FaceTracker) to skip detection,
+        and a DeltaSkipper to reuse restored faces that barely changed.
+        """
+        landmarks = landmarks or [None] * len(frames)
+        faces = [self._detect_align(frame, frame_landmarks) for frame, frame_landmarks in zip(frames, landmarks)]
+        
+        # Each face is either restored (index into `pending`) or reuses a restored crop
+        references = skipper.begin() if skipper else None
+        pending = []
+        sources = []
+        for frame_faces in faces:
+            frame_sources = []
+            for slot, crop in enumerate(frame_faces.crops):
+                reused = skipper.match(references, slot, crop, len(pending)) if skipper else None
+                if reused is None:
+                    frame_sources.append(len(pending))
+                    pending.append(crop)
+                else:
+                    frame_sources.append(reused)
+            sources.append(frame_sources)
+        
+        restored = self._restore_faces(pending, weight, batch_size or settings.ENHANCE_BATCH_SIZE)
+        for frame_faces, frame_sources in zip(faces, sources):
+            for crop, source in zip(frame_faces.crops, frame_sources):
+                face = restored[source] if isinstance(source, int) else source
+                frame_faces.restored.append(crop if face is None else face)  # failed: paste the crop as is
+        if skipper:
+            skipper.finish(references, restored)
+        
+        return [self._paste_back(frame, frame_faces) for frame, frame_faces in zip(frames, faces)]
+    
+    def _detect_landmarks(self, frame: np.ndarray) -> List[np.ndarray]:
+        """Full face detection: 5-point landmarks of every face in the frame"""
+        helper = self.enhancer.face_helper
+        with self._helper_lock:
+            helper.clean_all()
+            helper.read_image(frame)
+            helper.get_face_landmarks_5(only_center_face=False, eye_dist_threshold=5)
+            return list(helper.all_landmarks_5)
+    
+    def _detect_align(self, frame: np.ndarray, landmarks: Optional[List[np.ndarray]] = None) -> FrameFaces:
+        """5-point landmarks (detected unless given) and 512px aligned crops for one frame"""
+        helper = self.enhancer.face_helper
+        with self._helper_lock:
+            helper.clean_all()
+            helper.read_image(frame)
+            if landmarks is None:
+                helper.get_face_landmarks_5(only_center_face=False, eye_dist_threshold=5)
+            else:
+                helper.all_landmarks_5 = list(landmarks)
+            helper.align_warp_face()
+            return FrameFaces(affines=list(helper.affine_matrices), crops=list(helper.cropped_faces))
+    
+    def _restore_faces(self, crops: List[np.ndarray], weight: float, batch_size: int) -> List[Optional[np.ndarray]]:
+        """Run GFPGAN over aligned crops, `batch_size` faces per forward pass (None where it failed)"""
+        batch_size = max(batch_size, 1)
+        restored = []
+        for start in range(0, len(crops), batch_size):
+            restored.extend(self._forward(crops[start:start + batch_size], weight))
+        return restored
+    
+    def _forward(self, crops: List[np.ndarray], weight: float) -> List[Optional[np.ndarray]]:
+        """One stacked forward pass; halves the batch if it runs out of memory"""
+        # BGR uint8 NHWC -> RGB float NCHW in [-1, 1] (as GFPGANer.enhance does per face)
+        batch = (np.stack(crops)[..., ::-1].astype(np.float32) / 255.0 - 0.5) / 0.5
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+        
+        try:
+            output = self._infer_onnx(batch) if self._onnx is not None else self._infer_torch(batch, weight)
+        except Exception as e:  # torch RuntimeError / onnxruntime Fail, RuntimeException
+            if len(crops) > 1 and "memory" in str(e).lower():
+                logger.warning(f"GFPGAN batch of {len(crops)} ran out of memory, splitting")
+                half = len(crops) // 2
+                return self._forward(crops[:half], weight) + self._forward(crops[half:], weight)
+            logger.warning(f"GFPGAN inference failed: {e}")
+            return [None] * len(crops)
+        
+        output = ((np.clip(output, -1, 1) + 1) / 2 * 255.0).round()
+        images = output.transpose(0, 2, 3, 1).astype(np.uint8)
+        return [np.ascontiguousarray(image[..., ::-1]) for image in images]
+    
+    def _infer_torch(self, batch: np.ndarray, weight: float) -> np.ndarray:
+        tensor = torch.from_numpy(batch).to(self.device)
+        with torch.no_grad():
+            output = self.enhancer.gfpgan(
+                tensor, return_rgb=False, weight=weight, randomize_noise=self.randomize_noise
+            )[0]
+        return output.float().cpu().numpy()
+    
+    def _infer_onnx(self, batch: np.ndarray) -> np.ndarray:
+        """ONNX Runtime pass; the graph has a fixed batch size, so the last chunk is zero-padded"""
+        size = self._onnx_batch
+        outputs = []
+        for start in range(0, len(batch), size):
+            chunk = batch[start:start + size]
+            if len(chunk) < size:
+                chunk = np.concatenate([chunk, np.zeros((size - len(chunk),) + chunk.shape[1:], np.float32)])
+            outputs.append(self._onnx.run(None, {"input": chunk})[0][:len(batch) - start])
+        return np.concatenate(outputs)
+    
+    def _paste_back(self, frame: np.ndarray, frame_faces: FrameFaces) -> np.ndarray:
+        """
+        Blend restored faces into the (upscaled) frame
+        
+        facexlib warps, masks and blends over the whole frame; here it only
+        sees each face's bounding region (same result, since the warped face
+        and its soft mask lie inside it), and the background is resized once.
+        """
+        helper = self.enhancer.face_helper
+        scale = int(helper.upscale_factor)
+        h, w = frame.shape[:2]
+        if scale == 1:
+            output = frame.copy()
+        else:
+            output = cv2.resize(frame, (w * scale, h * scale), interpolation=cv2.INTER_LANCZOS4)
+        
+        for affine, restored in zip(frame_faces.affines, frame_faces.restored):
+            x0, y0, x1, y1 = _face_region(affine, helper.face_size, w, h)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            # Same alignment, expressed in region coordinates
+            region_affine = affine.copy()
+            region_affine[:, 2] += affine[:, :2] @ np.array([x0, y0], dtype=affine.dtype)
+            region = np.s_[y0 * scale:y1 * scale, x0 * scale:x1 * scale]
+            
+            with self._helper_lock:
+                helper.clean_all()
+                helper.read_image(frame[y0:y1, x0:x1])
+                helper.affine_matrices = [region_affine]
+                helper.restored_faces = [restored]
+                helper.get_inverse_affine(None)
+                output[region] = helper.paste_faces_to_input_image(upsample_img=output[region])
+        
+        return output
+    
+    def close(self):
+        """Stop the segment worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
     def clear_gpu_memory(self):
         """Clear GPU memory"""
         if GFPGAN_AVAILABLE and torch.cuda.is_available():
@@ -249,5 +745,75 @@ class FaceEnhancer:
             logger.info("✓ GPU memory cleared")
 
 
+def _face_region(affine: np.ndarray, face_size, width: int, height: int, margin: int = 4):
+    """Frame-space bounding box (x0, y0, x1, y1) of an aligned face crop"""
+    inverse = cv2.invertAffineTransform(affine)
+    face_w, face_h = face_size
+    corners = np.array([[0, 0], [face_w, 0], [0, face_h], [face_w, face_h]], dtype=np.float64)
+    points = corners @ inverse[:, :2].T + inverse[:, 2]
+    x0, y0 = np.floor(points.min(axis=0)).astype(int) - margin
+    x1, y1 = np.ceil(points.max(axis=0)).astype(int) + margin
+    return max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+
+
+@contextmanager
+def _part_path(path: Path):
+    """Process-unique temp path, atomically renamed to `path` on success"""
+    part_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.part"
+    try:
+        yield part_path
+        os.replace(part_path, path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
+def _init_segment_worker(threads: int):
+    """Pool initializer: cap intra-op threads and load this process's own model"""
+    if torch is not None:
+        torch.set_num_threads(threads)
+    cv2.setNumThreads(1)
+    enhancer.load_model()
+
+
+def _enhance_segment(segment_path: str, output_path: str, weight: float, encoder: dict) -> dict:
+    """Runs in a pool process: enhance one video-only segment"""
+    if enhancer.enhancer is None:
+        raise RuntimeError("GFPGAN not available in worker process")
+    return enhancer._enhance_video_frames(
+        segment_path, output_path, weight, encoder, lambda progress: None, audio=False
+    )
+
+
+def _split_segments(video_path: str, work_dir: str) -> List[str]:
+    """Cut the video stream at keyframes into ~ENHANCE_SEGMENT_SECONDS pieces (stream copy)"""
+    pattern = os.path.join(work_dir, "segment_%04d.mp4")
+    _run_ffmpeg([
+        "-i", video_path, "-map", "0:v:0", "-an", "-c", "copy",
+        "-f", "segment", "-segment_time", str(settings.ENHANCE_SEGMENT_SECONDS),
+        "-reset_timestamps", "1", pattern
+    ])
+    return sorted(str(p) for p in Path(work_dir).glob("segment_*.mp4"))
+
+
+def _concat_segments(segments: List[str], audio_source: str, output_path: str, work_dir: str):
+    """Join encoded segments without re-encoding and mux the source audio"""
+    list_path = os.path.join(work_dir, "segments.txt")
+    with open(list_path, "w") as f:
+        for segment in segments:
+            f.write(f"file '{os.path.abspath(segment)}'\n")
+    _run_ffmpeg([
+        "-f", "concat", "-safe", "0", "-i", list_path, "-i", audio_source,
+        "-map", "0:v:0", "-map", "1:a:0?", "-c", "copy", "-shortest",
+        "-movflags", "+faststart", output_path
+    ])
+
+
+def _run_ffmpeg(args: List[str]):
+    result = subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({result.returncode}): {result.stderr.decode(errors='replace').strip()}")
+
+
 # Global instance
 enhancer = FaceEnhancer()
@@ -0,0 +1,98 @@
+"""
+Antigravity AI - Face Detection Helper
+Single entry point for "where is the face?" across engines
+MediaPipe (preferred) → OpenCV Haar cascade → None
+"""
+import logging
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import mediapipe as mp
+    MEDIAPIPE_AVAILABLE = hasattr(mp, "solutions")
+except ImportError:
+    mp = None
+    MEDIAPIPE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (x, y, w, h, score) in pixels
+FaceBox = Tuple[int, int, int, int, float]
+
+
+class FaceDetector:
+    """Largest-face detector with graceful backend fallback"""
+
+    def __init__(self, min_confidence: float = 0.5):
+        self.min_confidence = min_confidence
+        self._mp_detector = None
+        self._haar = None
+        self._lock = threading.Lock()  # MediaPipe graphs are not thread-safe
+
+        if MEDIAPIPE_AVAILABLE:
+            try:
+                self._mp_detector = mp.solutions.face_detection.FaceDetection(
+                    model_selection=1,  # full-range model (faces up to ~5m)
+                    min_detection_confidence=min_confidence
+                )
+            except Exception as e:
+                logger.warning(f"MediaPipe face detection unavailable: {e}")
+
+        if self._mp_detector is None and hasattr(cv2, "CascadeClassifier"):
+            self._haar = cv2.CascadeClassifier(
+                cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            )
+
+    @property
+    def is_available(self) -> bool:
+        return self._mp_detector is not None or self._haar is not None
+
+    def detect_largest(self, image: np.ndarray) -> Optional[FaceBox]:
+        """Largest face in a BGR image, or None if no face was found"""
+        if self._mp_detector is not None:
+            return self._detect_mediapipe(image)
+        if self._haar is not None:
+            return self._detect_haar(image)
+        return None
+
+    def _detect_mediapipe(self, image: np.ndarray) -> Optional[FaceBox]:
+        h, w = image.shape[:2]
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with self._lock:
+            results = self._mp_detector.process(rgb)
+
+        if not results.detections:
+            return None
+
+        best = None
+        for detection in results.detections:
+            box = detection.location_data.relative_bounding_box
+            x = int(max(box.xmin, 0.0) * w)
+            y = int(max(box.ymin, 0.0) * h)
+            bw = int(min(box.width * w, w - x))
+            bh = int(min(box.height * h, h - y))
+            if bw <= 0 or bh <= 0:
+                continue
+            candidate = (x, y, bw, bh, float(detection.score[0]))
+            if best is None or bw * bh > best[2] * best[3]:
+                best = candidate
+        return best
+
+    def _detect_haar(self, image: np.ndarray) -> Optional[FaceBox]:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        faces = self._haar.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=5,
+            minSize=(max(w // 10, 32), max(h // 10, 32))
+        )
+        if len(faces) == 0:
+            return None
+        x, y, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return int(x), int(y), int(fw), int(fh), 1.0
+
+
+# Global instance
+face_detector = FaceDetector()
@@ -0,0 +1,121 @@
+"""
+Antigravity AI - Face Landmark Tracker
+Carries 5-point face landmarks from frame to frame with pyramidal
+Lucas-Kanade optical flow, so the full face detector only runs on keyframes
+or when tracking becomes unreliable. Landmarks are EMA-smoothed, which also
+steadies the alignment (less jitter in the restored face).
+"""
+import logging
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_LK_PARAMS = dict(
+    winSize=(21, 21),
+    maxLevel=3,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01)
+)
+
+
+class FaceTracker:
+    """
+    Per-video landmark tracker (frames must be fed in order)
+
+    Args:
+        detect: frame -> list of (5, 2) landmark arrays (the full detector)
+        keyframe_interval: force a full detection every N frames
+        max_error: max forward-backward flow error, as a fraction of the
+            eye distance, before a frame falls back to full detection
+        smoothing: EMA weight of the newest measurement (1.0 = no smoothing)
+    """
+
+    def __init__(
+        self,
+        detect: Callable[[np.ndarray], List[np.ndarray]],
+        keyframe_interval: int = 30,
+        max_error: float = 0.05,
+        smoothing: float = 0.6
+    ):
+        self.detect = detect
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.max_error = max_error
+        self.smoothing = min(max(smoothing, 0.0), 1.0)
+
+        self._prev_gray: Optional[np.ndarray] = None
+        self._raw: Optional[np.ndarray] = None  # (faces, 5, 2) unsmoothed, what LK follows
+        self._smoothed: Optional[np.ndarray] = None
+        self._since_keyframe = 0
+
+        self.frames = 0
+        self.detections = 0
+
+    def track(self, frame: np.ndarray) -> List[np.ndarray]:
+        """Landmarks of every face in `frame`, as (5, 2) float arrays"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.frames += 1
+
+        tracked = None
+        if self._raw is not None and len(self._raw) and self._since_keyframe < self.keyframe_interval:
+            tracked = self._flow(gray)
+
+        if tracked is None:
+            self._keyframe(frame)
+        else:
+            self._raw = tracked
+            self._smoothed = self._ema(tracked)
+            self._since_keyframe += 1
+
+        self._prev_gray = gray
+        return [landmarks.copy() for landmarks in self._smoothed]
+
+    @property
+    def detection_ratio(self) -> float:
+        return self.detections / self.frames if self.frames else 0.0
+
+    def _keyframe(self, frame: np.ndarray):
+        detected = [np.asarray(landmarks, dtype=np.float32) for landmarks in self.detect(frame)]
+        raw = np.stack(detected) if detected else np.zeros((0, 5, 2), np.float32)
+        self.detections += 1
+        self._since_keyframe = 0
+
+        # Keep smoothing across keyframes when it is the same face(s), so a
+        # periodic re-detection doesn't make the alignment jump
+        same_faces = (
+            self._smoothed is not None
+            and self._smoothed.shape == raw.shape
+            and len(raw)
+            and np.all(np.abs(raw - self._smoothed).max(axis=(1, 2)) < _eye_distance(raw) * 0.5)
+        )
+        self._raw = raw
+        self._smoothed = self._ema(raw) if same_faces else raw.copy()
+
+    def _flow(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """LK flow of the previous raw landmarks into `gray`; None if unreliable"""
+        prev_pts = self._raw.reshape(-1, 1, 2).astype(np.float32)
+        next_pts, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, prev_pts, None, **_LK_PARAMS)
+        if next_pts is None or not status.all():
+            return None
+
+        # Forward-backward check: flowing back should land on the start point
+        back_pts, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, next_pts, None, **_LK_PARAMS)
+        if back_pts is None or not back_status.all():
+            return None
+
+        error = np.linalg.norm(back_pts - prev_pts, axis=2).reshape(len(self._raw), 5).max(axis=1)
+        if np.any(error > np.maximum(_eye_distance(self._raw) * self.max_error, 1.0)):
+            return None
+
+        return next_pts.reshape(self._raw.shape)
+
+    def _ema(self, landmarks: np.ndarray) -> np.ndarray:
+        if self._smoothed is None or self._smoothed.shape != landmarks.shape:
+            return landmarks.copy()
+        return self.smoothing * landmarks + (1.0 - self.smoothing) * self._smoothed
+
+
+def _eye_distance(landmarks: np.ndarray) -> np.ndarray:
+    """Per-face distance between the two eye landmarks, shape (faces,)"""
+    return np.linalg.norm(landmarks[:, 0] - landmarks[:, 1], axis=1)
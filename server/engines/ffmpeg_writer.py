@@ -0,0 +1,111 @@
+"""
+Antigravity AI - FFmpeg Frame Writer
+Streams raw BGR frames into a single libx264 encode over stdin,
+muxing audio in the same invocation (no intermediate file, no second encode)
+"""
+import logging
+import shutil
+import subprocess
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FFmpegVideoWriter:
+    """
+    Minimal VideoWriter replacement backed by an ffmpeg subprocess
+
+    Usage:
+        with FFmpegVideoWriter(out, w, h, fps, audio_path=wav) as writer:
+            for frame in frames:
+                writer.write(frame)
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        audio_path: Optional[str] = None,
+        preset: str = "veryfast",
+        crf: int = 23,
+        audio_codec: str = "aac",
+        extra_args: Optional[List[str]] = None
+    ):
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg not found")
+
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.frames_written = 0
+
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+        ]
+        if audio_path:
+            cmd += ["-i", audio_path]
+
+        cmd += ["-map", "0:v:0"]
+        if audio_path:
+            cmd += ["-map", "1:a:0?", "-c:a", audio_codec, "-shortest"]
+
+        cmd += [
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        ]
+        cmd += extra_args or []
+        cmd.append(output_path)
+
+        # stderr goes to a temp file so a chatty encoder can never block the pipe
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write(self, frame: np.ndarray):
+        """Write one HxWx3 uint8 BGR frame"""
+        if frame.shape[0] != self.height or frame.shape[1] != self.width:
+            raise ValueError(
+                f"Frame size {frame.shape[1]}x{frame.shape[0]} != writer size {self.width}x{self.height}"
+            )
+        self.process.stdin.write(memoryview(np.ascontiguousarray(frame, dtype=np.uint8)))
+        self.frames_written += 1
+
+    def close(self):
+        """Flush, wait for ffmpeg and raise if the encode failed"""
+        if self.process.stdin and not self.process.stdin.closed:
+            self.process.stdin.close()
+        return_code = self.process.wait()
+
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace")
+        self._stderr.close()
+
+        if return_code != 0:
+            raise RuntimeError(f"ffmpeg encode failed ({return_code}): {stderr.strip()}")
+
+    def abort(self):
+        """Kill the encoder without waiting for a valid file"""
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.kill()
+        self.process.wait()
+        self._stderr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
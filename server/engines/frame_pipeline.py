@@ -0,0 +1,121 @@
+"""
+Antigravity AI - Threaded Frame Pipeline
+Decode -> process -> encode on separate threads, linked by bounded queues.
+Items come out in source order; at most `max_in_flight` items are buffered
+between the source and the sink, so a slow stage back-pressures the others.
+"""
+import logging
+import queue
+import threading
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_POLL_INTERVAL = 0.1  # seconds between stop checks while blocked
+
+
+def run_frame_pipeline(
+    source: Iterable,
+    process: Callable,
+    sink: Callable,
+    workers: int = 1,
+    max_in_flight: int = 4
+) -> int:
+    """
+    Feed every item of `source` through `process` and hand results to `sink` in order
+
+    `source` is iterated on a decoder thread, `process` runs on `workers`
+    threads and `sink` runs on the calling thread. The first exception from
+    any stage stops the pipeline and is re-raised here.
+
+    Returns:
+        Number of items written to the sink
+    """
+    workers = max(workers, 1)
+    slots = threading.Semaphore(max(max_in_flight, workers))
+    inbox: queue.Queue = queue.Queue()
+    outbox: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    errors = []
+
+    def fail(e: BaseException):
+        if not errors:
+            errors.append(e)
+        stop.set()
+
+    def acquire_slot() -> bool:
+        while not stop.is_set():
+            if slots.acquire(timeout=_POLL_INTERVAL):
+                return True
+        return False
+
+    def decode():
+        try:
+            # Claim a slot before pulling the next item, so none sits decoded outside the bound
+            items = iter(source)
+            seq = 0
+            while acquire_slot():
+                try:
+                    item = next(items)
+                except StopIteration:
+                    slots.release()
+                    break
+                inbox.put((seq, item))
+                seq += 1
+        except BaseException as e:
+            fail(e)
+        finally:
+            for _ in range(workers):
+                inbox.put(_DONE)
+
+    def work():
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                break
+            if stop.is_set():
+                continue
+            seq, item = entry
+            try:
+                outbox.put((seq, process(item)))
+            except BaseException as e:
+                fail(e)
+        outbox.put(_DONE)
+
+    threads = [threading.Thread(target=decode, name="pipeline-decode", daemon=True)]
+    threads += [
+        threading.Thread(target=work, name=f"pipeline-work-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Encoder stage: reorder and write on the calling thread
+    pending = {}
+    next_seq = 0
+    finished_workers = 0
+    try:
+        while finished_workers < workers and not stop.is_set():
+            try:
+                entry = outbox.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if entry is _DONE:
+                finished_workers += 1
+                continue
+            seq, result = entry
+            pending[seq] = result
+            while next_seq in pending:
+                sink(pending.pop(next_seq))
+                next_seq += 1
+                slots.release()
+    except BaseException as e:
+        fail(e)
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    return next_seq
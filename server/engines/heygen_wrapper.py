@@ -4,14 +4,47 @@ FREE tier: 10 credits/month, then pay-as-you-go
 """
 import asyncio
 import aiohttp
+import hashlib
+import hmac
 import logging
+import mimetypes
+import shutil
+import sqlite3
+import tempfile
 import time
+import wave
 from pathlib import Path
-from typing import Optional, Dict
+from typing import AsyncIterator, Optional, Dict, Tuple
+from urllib.parse import urlparse
 import os
 
+from core.config import settings
+from core.disk_cache import hash_file
+from core.downloads import download_file
+from core.shared_state import shared_state
+
 logger = logging.getLogger(__name__)
 
+# Webhook results land here so the worker that is waiting sees them even
+# when HeyGen's callback was routed to a different worker process
+shared_state.register_schema("""
+CREATE TABLE IF NOT EXISTS heygen_completions (
+    video_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    video_url TEXT,
+    error TEXT,
+    received_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS heygen_assets (
+    content_hash TEXT NOT NULL,
+    asset_type TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    asset_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (content_hash, asset_type, variant)
+);
+""")
+
 
 class HeyGenEngine:
     """
@@ -27,14 +60,61 @@ class HeyGenEngine:
     
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv("HEYGEN_API_KEY")
-        self.base_url = "https://api.heygen.com/v2"
+        self.base_url = settings.HEYGEN_BASE_URL.rstrip("/")
         self.is_available = self.api_key is not None
         
+        # One pooled session per engine (created lazily inside the event loop)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._api_timeout = aiohttp.ClientTimeout(
+            total=settings.HEYGEN_API_TIMEOUT,
+            connect=settings.HEYGEN_CONNECT_TIMEOUT
+        )
+        self._transfer_timeout = aiohttp.ClientTimeout(
+            total=settings.HEYGEN_TRANSFER_TIMEOUT,
+            connect=settings.HEYGEN_CONNECT_TIMEOUT
+        )
+        
+        # Result downloads: no total cap (resume handles drops), only a stall limit
+        self._download_timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=settings.HEYGEN_CONNECT_TIMEOUT,
+            sock_read=settings.DOWNLOAD_READ_TIMEOUT
+        )
+        
+        # Completion waiters (video_id -> future resolved with the webhook's completion)
+        self._waiters: Dict[str, asyncio.Future] = {}
+        if settings.HEYGEN_WEBHOOK_URL and not settings.HEYGEN_WEBHOOK_SECRET:
+            logger.warning("⚠️ HEYGEN_WEBHOOK_URL is set without HEYGEN_WEBHOOK_SECRET - webhooks disabled")
+        # Learned render seconds per audio second (EWMA), drives the poll schedule
+        self.render_ratio = settings.HEYGEN_RENDER_RATIO
+        self.asset_cache_stats = {"hits": 0, "misses": 0, "invalidated": 0}
+        
         if not self.is_available:
             logger.warning("⚠️ HeyGen API key not found. Set HEYGEN_API_KEY environment variable.")
         else:
             logger.info("✅ HeyGen Engine initialized")
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Shared keep-alive session (re-created if closed or bound to another loop)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=settings.HEYGEN_POOL_LIMIT,
+                limit_per_host=settings.HEYGEN_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=settings.HEYGEN_DNS_CACHE_TTL,
+                keepalive_timeout=settings.HEYGEN_KEEPALIVE_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._api_timeout)
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """Close the pooled session (called on app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     async def generate_video(
         self,
         image_path: str,
@@ -62,15 +142,27 @@ class HeyGenEngine:
         logger.info(f"  Audio: {audio_path}")
         
         try:
-            # Step 1: Upload assets
-            image_url = await self._upload_asset(image_path, "image")
-            audio_url = await self._upload_asset(audio_path, "audio")
+            # Step 1: Upload assets (skipped for content HeyGen already has)
+            image_asset = await self._get_or_upload_asset(image_path, "image")
+            audio_asset = await self._get_or_upload_asset(audio_path, "audio")
             
             # Step 2: Create video generation request
-            video_id = await self._create_video_request(image_url, audio_url, options)
+            try:
+                video_id = await self._create_video_request(image_asset[0], audio_asset[0], options)
+            except RuntimeError:
+                cached = [asset for asset in (image_asset, audio_asset) if asset[1]]
+                if not cached:
+                    raise
+                # A cached asset id may have expired on HeyGen's side: drop it and retry once
+                logger.warning("⚠️ Video request failed with cached asset ids - re-uploading")
+                for asset_id, _ in cached:
+                    self._forget_asset(asset_id)
+                image_asset = await self._get_or_upload_asset(image_path, "image")
+                audio_asset = await self._get_or_upload_asset(audio_path, "audio")
+                video_id = await self._create_video_request(image_asset[0], audio_asset[0], options)
             
-            # Step 3: Poll for completion
-            result_url = await self._wait_for_completion(video_id)
+            # Step 3: Wait for completion (webhook, or adaptive polling)
+            result_url = await self._wait_for_completion(video_id, self._audio_duration(audio_path))
             
             # Step 4: Download result
             await self._download_video(result_url, output_path)
@@ -93,38 +185,155 @@ class HeyGenEngine:
                 "error": str(e)
             }
     
+    async def _get_or_upload_asset(self, file_path: str, asset_type: str) -> Tuple[str, bool]:
+        """
+        HeyGen asset id for this file's content: (asset_id, from_cache)
+        
+        Keyed by content hash + asset type + upload variant (audio transcode
+        settings), shared by all workers and persisted across restarts.
+        """
+        content_hash = await asyncio.to_thread(hash_file, file_path)
+        variant = self._upload_variant(asset_type)
+        
+        try:
+            rows = shared_state.query(
+                "SELECT asset_id FROM heygen_assets "
+                "WHERE content_hash = ? AND asset_type = ? AND variant = ? AND created_at > ?",
+                (content_hash, asset_type, variant, time.time() - settings.HEYGEN_ASSET_CACHE_TTL)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"HeyGen asset cache unavailable: {e}")
+            rows = []
+        if rows:
+            self.asset_cache_stats["hits"] += 1
+            logger.info(f"♻️ Reusing HeyGen {asset_type} asset {rows[0]['asset_id']} (content {content_hash[:12]})")
+            return rows[0]["asset_id"], True
+        
+        self.asset_cache_stats["misses"] += 1
+        asset_id = await self._upload_asset(file_path, asset_type)
+        
+        try:
+            shared_state.execute(
+                "INSERT OR REPLACE INTO heygen_assets (content_hash, asset_type, variant, asset_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (content_hash, asset_type, variant, asset_id, time.time())
+            )
+            shared_state.execute(
+                "DELETE FROM heygen_assets WHERE created_at <= ?",
+                (time.time() - settings.HEYGEN_ASSET_CACHE_TTL,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"HeyGen asset cache unavailable: {e}")
+        return asset_id, False
+    
+    @staticmethod
+    def _upload_variant(asset_type: str) -> str:
+        """What actually gets uploaded for this type (audio may be transcoded)"""
+        if asset_type == "audio" and settings.HEYGEN_AUDIO_UPLOAD_CODEC:
+            return f"{settings.HEYGEN_AUDIO_UPLOAD_CODEC}@{settings.HEYGEN_AUDIO_UPLOAD_BITRATE}"
+        return "original"
+    
+    def _forget_asset(self, asset_id: str):
+        self.asset_cache_stats["invalidated"] += 1
+        try:
+            shared_state.execute("DELETE FROM heygen_assets WHERE asset_id = ?", (asset_id,))
+        except sqlite3.Error as e:
+            logger.warning(f"HeyGen asset cache unavailable: {e}")
+    
     async def _upload_asset(self, file_path: str, asset_type: str) -> str:
         """Upload image or audio to HeyGen and return URL"""
         logger.info(f"📤 Uploading {asset_type}: {file_path}")
         
-        async with aiohttp.ClientSession() as session:
-            # Get upload URL
-            async with session.post(
-                f"{self.base_url}/assets/upload",
+        session = await self._get_session()
+        
+        # Get upload URL
+        async with session.post(
+            f"{self.base_url}/assets/upload",
+            headers={
+                "X-Api-Key": self.api_key,
+                "Content-Type": "application/json"
+            },
+            json={"type": asset_type}
+        ) as resp:
+            if resp.status != 200:
+                error = await resp.text()
+                raise RuntimeError(f"Failed to get upload URL: {error}")
+            
+            upload_data = await resp.json()
+            upload_url = upload_data["data"]["upload_url"]
+            asset_id = upload_data["data"]["asset_id"]
+        
+        # Stream the file from disk (peak memory = one chunk, not the whole asset)
+        upload_path, content_type, cleanup = await self._prepare_upload(file_path, asset_type)
+        try:
+            size = os.path.getsize(upload_path)
+            async with session.put(
+                upload_url,
+                data=self._iter_file(upload_path),
                 headers={
-                    "X-Api-Key": self.api_key,
-                    "Content-Type": "application/json"
+                    "Content-Type": content_type,
+                    "Content-Length": str(size)  # presigned PUTs reject chunked bodies
                 },
-                json={"type": asset_type}
+                timeout=self._transfer_timeout
             ) as resp:
-                if resp.status != 200:
-                    error = await resp.text()
-                    raise RuntimeError(f"Failed to get upload URL: {error}")
-                
-                upload_data = await resp.json()
-                upload_url = upload_data["data"]["upload_url"]
-                asset_id = upload_data["data"]["asset_id"]
-            
-            # Upload file
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-            
-            async with session.put(upload_url, data=file_data) as resp:
                 if resp.status not in [200, 201]:
                     raise RuntimeError(f"Failed to upload {asset_type}")
-            
-            logger.info(f"✅ Uploaded {asset_type}: {asset_id}")
-            return asset_id
+        finally:
+            if cleanup:
+                os.remove(upload_path)
+        
+        logger.info(f"✅ Uploaded {asset_type}: {asset_id}")
+        return asset_id
+    
+    async def _prepare_upload(self, file_path: str, asset_type: str) -> Tuple[str, str, bool]:
+        """
+        Path to upload, its content type, and whether it is a temp file to delete
+        
+        Audio is transcoded to HEYGEN_AUDIO_UPLOAD_CODEC when configured
+        (a 16-bit WAV is ~10x larger than 128k MP3); falls back to the original.
+        """
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        codec = settings.HEYGEN_AUDIO_UPLOAD_CODEC
+        
+        if asset_type != "audio" or not codec or Path(file_path).suffix.lstrip(".") == codec:
+            return file_path, content_type, False
+        if not shutil.which("ffmpeg"):
+            return file_path, content_type, False
+        
+        suffix = ".m4a" if codec == "aac" else f".{codec}"
+        fd, transcoded = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-y", "-v", "error", "-i", file_path,
+            "-vn", "-c:a", "libmp3lame" if codec == "mp3" else codec,
+            "-b:a", settings.HEYGEN_AUDIO_UPLOAD_BITRATE,
+            transcoded,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        
+        if process.returncode != 0:
+            logger.warning(f"⚠️ Audio transcode failed, uploading original: {stderr.decode(errors='replace').strip()}")
+            os.remove(transcoded)
+            return file_path, content_type, False
+        
+        logger.info(
+            f"🎧 Transcoded audio for upload: {os.path.getsize(file_path)} → "
+            f"{os.path.getsize(transcoded)} bytes ({codec})"
+        )
+        return transcoded, mimetypes.guess_type(transcoded)[0] or "audio/mpeg", True
+    
+    async def _iter_file(self, file_path: str) -> AsyncIterator[bytes]:
+        """Read a file in chunks off the event loop"""
+        chunk_size = settings.HEYGEN_UPLOAD_CHUNK_SIZE
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
     
     async def _create_video_request(
         self,
@@ -157,78 +366,239 @@ class HeyGenEngine:
             },
             "aspect_ratio": options.get("aspect_ratio", "16:9")
         }
+        if self.webhooks_enabled:
+            payload["callback_url"] = settings.HEYGEN_WEBHOOK_URL
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/video/generate",
-                headers={
-                    "X-Api-Key": self.api_key,
-                    "Content-Type": "application/json"
-                },
-                json=payload
-            ) as resp:
-                if resp.status != 200:
-                    error = await resp.text()
-                    raise RuntimeError(f"Failed to create video: {error}")
+        session = await self._get_session()
+        async with session.post(
+            f"{self.base_url}/video/generate",
+            headers={
+                "X-Api-Key": self.api_key,
+                "Content-Type": "application/json"
+            },
+            json=payload
+        ) as resp:
+            if resp.status != 200:
+                error = await resp.text()
+                raise RuntimeError(f"Failed to create video: {error}")
+            
+            result = await resp.json()
+            video_id = result["data"]["video_id"]
+            
+            logger.info(f"✅ Video request created: {video_id}")
+            return video_id
+    
+    async def _wait_for_completion(self, video_id: str, audio_duration: Optional[float] = None) -> str:
+        """
+        Wait until the video is rendered and return its URL
+        
+        With a webhook configured the wait is woken by `notify_completion`
+        (same worker) or the shared completions table (other workers), with
+        sparse API polls as a safety net. Without one, polls follow the
+        expected render time instead of a fixed 5s interval.
+        """
+        expected = self._expected_render_seconds(audio_duration)
+        timeout = max(settings.HEYGEN_COMPLETION_TIMEOUT, expected * 3)
+        webhook = self.webhooks_enabled
+        logger.info(
+            f"⏳ Waiting for video generation (expected ~{expected:.0f}s, timeout: {timeout:.0f}s, "
+            f"{'webhook' if webhook else 'polling'})..."
+        )
+        
+        start_time = time.time()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[video_id] = waiter
+        next_poll = start_time + (
+            settings.HEYGEN_WEBHOOK_POLL_INTERVAL if webhook else self._next_poll_delay(0.0, expected)
+        )
+        
+        try:
+            while True:
+                elapsed = time.time() - start_time
+                if elapsed >= timeout:
+                    raise TimeoutError(f"Video generation timeout after {timeout:.0f}s")
+                
+                completion = self._take_completion(video_id)
+                if completion is None and waiter.done():
+                    completion = waiter.result()  # webhook here, but the shared table was busy
+                if completion is None and time.time() >= next_poll:
+                    completion = await self._poll_status(video_id)
+                    delay = settings.HEYGEN_WEBHOOK_POLL_INTERVAL if webhook else self._next_poll_delay(
+                        time.time() - start_time, expected
+                    )
+                    next_poll = time.time() + delay
                 
-                result = await resp.json()
-                video_id = result["data"]["video_id"]
+                if completion is not None:
+                    status, video_url, error = completion
+                    if status == "failed":
+                        raise RuntimeError(f"Video generation failed: {error or 'Unknown error'}")
+                    self._learn_render_ratio(time.time() - start_time, audio_duration)
+                    logger.info(f"✅ Video generation complete! ({time.time() - start_time:.1f}s)")
+                    return video_url
                 
-                logger.info(f"✅ Video request created: {video_id}")
-                return video_id
+                # Sleep until the next poll; a webhook in this worker wakes us early,
+                # one in another worker is picked up from the shared table within a second
+                wait = max(min(next_poll - time.time(), timeout - elapsed), 0.05)
+                if webhook:
+                    wait = min(wait, 1.0)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.pop(video_id, None)
+            if not waiter.done():
+                waiter.cancel()
     
-    async def _wait_for_completion(self, video_id: str, timeout: int = 300) -> str:
-        """Poll video status until complete or timeout"""
-        logger.info(f"⏳ Waiting for video generation (timeout: {timeout}s)...")
+    async def _poll_status(self, video_id: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """One status request; (status, video_url, error) once finished, else None"""
+        session = await self._get_session()
+        async with session.get(
+            f"{self.base_url}/video/{video_id}",
+            headers={"X-Api-Key": self.api_key}
+        ) as resp:
+            if resp.status != 200:
+                error = await resp.text()
+                raise RuntimeError(f"Failed to check status: {error}")
+            
+            result = await resp.json()
         
-        start_time = time.time()
+        data = result["data"]
+        status = data["status"]
+        logger.info(f"  Status: {status}")
+        
+        if status == "completed":
+            return "completed", data["video_url"], None
+        if status == "failed":
+            return "failed", None, data.get("error", "Unknown error")
+        return None
+    
+    def _expected_render_seconds(self, audio_duration: Optional[float]) -> float:
+        return settings.HEYGEN_RENDER_OVERHEAD + self.render_ratio * (audio_duration or 30.0)
+    
+    @staticmethod
+    def _next_poll_delay(elapsed: float, expected: float) -> float:
+        """
+        Poll schedule around the expected render time:
+        sleep through most of it, poll tightly near it, back off when overdue
+        """
+        if elapsed < expected * 0.7:
+            delay = expected * 0.7 - elapsed
+        elif elapsed < expected * 1.5:
+            delay = expected * 0.05
+        else:
+            delay = (elapsed - expected) * 0.25
+        return min(max(delay, settings.HEYGEN_POLL_MIN_INTERVAL), settings.HEYGEN_POLL_MAX_INTERVAL)
+    
+    def _learn_render_ratio(self, render_seconds: float, audio_duration: Optional[float]):
+        if not audio_duration:
+            return
+        observed = max(render_seconds - settings.HEYGEN_RENDER_OVERHEAD, 0.0) / audio_duration
+        self.render_ratio += 0.2 * (observed - self.render_ratio)
+    
+    @staticmethod
+    def _audio_duration(audio_path: str) -> Optional[float]:
+        try:
+            with wave.open(audio_path, "rb") as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        except Exception:
+            return None
+    
+    @property
+    def webhooks_enabled(self) -> bool:
+        """Webhooks need both the public URL and a signing secret"""
+        return bool(settings.HEYGEN_WEBHOOK_URL and settings.HEYGEN_WEBHOOK_SECRET)
+    
+    def verify_webhook(self, body: bytes, signature: Optional[str]) -> bool:
+        """HMAC-SHA256 check of the raw body (always false when no secret is configured)"""
+        secret = settings.HEYGEN_WEBHOOK_SECRET
+        if not secret or not signature:
+            return False
+        expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+    
+    def notify_completion(self, payload: Dict) -> Optional[str]:
+        """
+        Record a webhook event and wake the waiting job
+        
+        Accepts HeyGen's `{"event_type": "avatar_video.success"|"avatar_video.fail",
+        "event_data": {...}}` envelope. Returns the video_id, or None if ignored.
+        """
+        event_type = payload.get("event_type", "")
+        data = payload.get("event_data") or {}
+        video_id = data.get("video_id")
+        if not video_id:
+            return None
+        
+        if event_type.endswith("success"):
+            video_url = data.get("url") or data.get("video_url")
+            if not self._is_trusted_result_url(video_url):
+                logger.warning(f"⚠️ HeyGen webhook for {video_id} ignored: untrusted video URL")
+                return None
+            completion = ("completed", video_url, None)
+        elif event_type.endswith("fail"):
+            completion = ("failed", None, data.get("msg") or data.get("error") or "Unknown error")
+        else:
+            return None
         
-        async with aiohttp.ClientSession() as session:
-            while time.time() - start_time < timeout:
-                async with session.get(
-                    f"{self.base_url}/video/{video_id}",
-                    headers={"X-Api-Key": self.api_key}
-                ) as resp:
-                    if resp.status != 200:
-                        error = await resp.text()
-                        raise RuntimeError(f"Failed to check status: {error}")
-                    
-                    result = await resp.json()
-                    status = result["data"]["status"]
-                    
-                    logger.info(f"  Status: {status}")
-                    
-                    if status == "completed":
-                        video_url = result["data"]["video_url"]
-                        logger.info("✅ Video generation complete!")
-                        return video_url
-                    
-                    elif status == "failed":
-                        error = result["data"].get("error", "Unknown error")
-                        raise RuntimeError(f"Video generation failed: {error}")
-                    
-                    # Still processing, wait before next poll
-                    await asyncio.sleep(5)
-        
-        raise TimeoutError(f"Video generation timeout after {timeout}s")
+        now = time.time()
+        try:
+            shared_state.execute(
+                "INSERT OR REPLACE INTO heygen_completions (video_id, status, video_url, error, received_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (video_id, *completion, now)
+            )
+            # Events nobody claimed (job already timed out, other deployment) expire after a day
+            shared_state.execute("DELETE FROM heygen_completions WHERE received_at < ?", (now - 86400,))
+        except sqlite3.Error as e:
+            # A waiter in another worker falls back to its safety-net poll
+            logger.warning(f"HeyGen completion not shared: {e}")
+        
+        waiter = self._waiters.get(video_id)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(completion)
+        
+        logger.info(f"🔔 HeyGen webhook: {video_id} {completion[0]}")
+        return video_id
+    
+    def _is_trusted_result_url(self, url) -> bool:
+        """https, or the HEYGEN_BASE_URL origin itself (a local http stand-in)"""
+        if not isinstance(url, str):
+            return False
+        parsed, api = urlparse(url), urlparse(self.base_url)
+        return parsed.scheme == "https" or (parsed.scheme, parsed.netloc) == (api.scheme, api.netloc)
+    
+    def _take_completion(self, video_id: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """Pop a webhook result for this video from the shared table"""
+        if not self.webhooks_enabled:
+            return None
+        try:
+            # Polled every second per waiting job: a WAL read takes no lock, and
+            # the write only happens once, when there is a row to remove
+            rows = shared_state.query(
+                "SELECT status, video_url, error FROM heygen_completions WHERE video_id = ?", (video_id,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"HeyGen completions table busy: {e}")
+            return None
+        if not rows:
+            return None
+        try:
+            shared_state.execute("DELETE FROM heygen_completions WHERE video_id = ?", (video_id,))
+        except sqlite3.Error as e:
+            # Only this job waits on the video; a leftover row expires with the daily cleanup
+            logger.warning(f"HeyGen completion not removed: {e}")
+        row = rows[0]
+        return row["status"], row["video_url"], row["error"]
     
     async def _download_video(self, url: str, output_path: str):
-        """Download video from URL to local path"""
+        """Download video from URL to local path (resumable, atomic)"""
         logger.info(f"📥 Downloading video to {output_path}")
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    raise RuntimeError(f"Failed to download video: HTTP {resp.status}")
-                
-                with open(output_path, 'wb') as f:
-                    while True:
-                        chunk = await resp.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-        
-        logger.info("✅ Video downloaded successfully")
+        session = await self._get_session()
+        result = await download_file(url, output_path, session=session, timeout=self._download_timeout)
+        
+        logger.info(f"✅ Video downloaded successfully ({result['bytes']} bytes)")
     
     def _no_api_key_error(self) -> Dict:
         """Return error when API key not configured"""
@@ -249,7 +619,8 @@ class HeyGenEngine:
         image_path: str,
         audio_path: str,
         output_path: str,
-        style: str = "anime"
+        style: str = "anime",
+        options: Optional[Dict] = None
     ) -> Dict:
         """Generate anime animation (uses same API with style option)"""
         logger.info(f"🎨 Generating Anime animation ({style})")
@@ -257,7 +628,7 @@ class HeyGenEngine:
             image_path=image_path,
             audio_path=audio_path,
             output_path=output_path,
-            options={"avatar_style": style}
+            options={**(options or {}), "avatar_style": style}
         )
 
 
@@ -0,0 +1,239 @@
+"""
+Antigravity AI - Local CPU Talking-Head Engine
+Offline last-resort animator: mouth warp + subtle head motion driven by audio RMS
+Pure NumPy/OpenCV, renders a real MP4 in seconds with no network or GPU
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from engines.audio_postprocess import audio_postprocessor
+from engines.face_detection import face_detector
+from engines.ffmpeg_writer import FFmpegVideoWriter
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTalkingHeadEngine:
+    """
+    Audio-energy driven 2D animation
+
+    Per frame:
+    - Mouth: a precomputed Gaussian displacement field around the mouth is
+      scaled by the frame's RMS energy and applied with cv2.remap (ROI only)
+    - Head: small rotation/translation from slow sinusoids plus an
+      energy-driven nod, scaled by pose_intensity, applied with warpAffine
+    """
+
+    MAX_SIDE = 1280          # cap render resolution (longest side)
+    MOUTH_OPEN_RATIO = 0.09  # max jaw drop as a fraction of face height
+
+    def __init__(self):
+        self.is_available = True
+        logger.info("🖥️ Local talking-head engine initialized (CPU)")
+
+    async def generate_video(
+        self,
+        image_path: str,
+        audio_path: str,
+        output_path: str,
+        options: Optional[Dict] = None
+    ) -> Dict:
+        """Render a talking-head MP4 locally (never touches the network)"""
+        options = options or {}
+        pose_intensity = float(options.get("pose_intensity", 1.0))
+        fps = int(options.get("fps", 25))
+
+        logger.info(f"🖥️ Local animation: fps={fps}, pose_intensity={pose_intensity}")
+        start = time.time()
+
+        try:
+            frame_count = await asyncio.to_thread(
+                self._render, image_path, audio_path, output_path, pose_intensity, fps
+            )
+        except Exception as e:
+            logger.error(f"❌ Local animation failed: {e}")
+            return {
+                "video_path": None,
+                "status": "failed",
+                "source": "local_cpu",
+                "error": str(e)
+            }
+
+        elapsed = time.time() - start
+        logger.info(f"✅ Local animation rendered {frame_count} frames in {elapsed:.1f}s")
+
+        return {
+            "video_path": output_path,
+            "status": "success",
+            "source": "local_cpu",
+            "frame_count": frame_count,
+            "render_seconds": elapsed
+        }
+
+    async def animate_anime_character(
+        self,
+        image_path: str,
+        audio_path: str,
+        output_path: str,
+        style: str = "anime",
+        options: Optional[Dict] = None
+    ) -> Dict:
+        """Anime avatars use the same warp (works on drawn faces too)"""
+        return await self.generate_video(
+            image_path=image_path,
+            audio_path=audio_path,
+            output_path=output_path,
+            options={**(options or {}), "mode": "anime", "style": style}
+        )
+
+    def _render(
+        self,
+        image_path: str,
+        audio_path: str,
+        output_path: str,
+        pose_intensity: float,
+        fps: int
+    ) -> int:
+        """Blocking render loop (runs in a worker thread)"""
+        image = self._load_image(image_path)
+        h, w = image.shape[:2]
+
+        energy = self._frame_energy(audio_path, fps)
+        n_frames = len(energy)
+
+        face = self._detect_face(image)
+        roi, dx_field, dy_field, shade = self._mouth_fields(face, w, h)
+        x0, y0, x1, y1 = roi
+
+        # Base sampling grid for the mouth ROI (ROI-local coordinates)
+        grid_x, grid_y = np.meshgrid(
+            np.arange(x1 - x0, dtype=np.float32),
+            np.arange(y1 - y0, dtype=np.float32)
+        )
+        roi_src = image[y0:y1, x0:x1]
+
+        # Head motion curves (vectorized over all frames)
+        t = np.arange(n_frames, dtype=np.float32) / fps
+        angle = pose_intensity * (1.2 * np.sin(2 * np.pi * 0.23 * t) + 0.6 * np.sin(2 * np.pi * 0.61 * t + 1.3))
+        shift_x = pose_intensity * w * 0.004 * np.sin(2 * np.pi * 0.17 * t + 0.7)
+        shift_y = pose_intensity * h * (0.003 * np.sin(2 * np.pi * 0.29 * t) + 0.006 * energy)
+        center = (face[0] + face[2] / 2.0, face[1] + face[3] / 2.0)
+
+        frame = image.copy()
+        with FFmpegVideoWriter(output_path, w, h, fps, audio_path=audio_path) as writer:
+            for i in range(n_frames):
+                opening = energy[i]
+
+                # Mouth: warp only the ROI, in place on the working frame
+                frame[y0:y1, x0:x1] = roi_src
+                if opening > 0.02:
+                    map_x = grid_x - opening * dx_field
+                    map_y = grid_y - opening * dy_field
+                    warped = cv2.remap(roi_src, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+                    # Darken the gap between the lips as the mouth opens
+                    factor = 1.0 - (0.55 * opening) * shade
+                    frame[y0:y1, x0:x1] = (warped * factor[..., None]).astype(np.uint8)
+
+                # Head: rotation about the face center + drift/nod
+                matrix = cv2.getRotationMatrix2D(center, float(angle[i]), 1.0)
+                matrix[0, 2] += shift_x[i]
+                matrix[1, 2] += shift_y[i]
+                moved = cv2.warpAffine(frame, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+
+                writer.write(moved)
+
+        return n_frames
+
+    def _load_image(self, image_path: str) -> np.ndarray:
+        """Read, cap resolution and force even dimensions (yuv420p)"""
+        image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Cannot read image: {image_path}")
+
+        h, w = image.shape[:2]
+        scale = min(1.0, self.MAX_SIDE / max(h, w))
+        new_w = int(w * scale) // 2 * 2
+        new_h = int(h * scale) // 2 * 2
+        if (new_w, new_h) != (w, h):
+            image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        return image
+
+    def _frame_energy(self, audio_path: str, fps: int) -> np.ndarray:
+        """Per-video-frame RMS energy in [0, 1], smoothed with fast attack / slower release"""
+        samples, sample_rate, channels = audio_postprocessor.decode(audio_path)
+        samples = audio_postprocessor.downmix(samples, channels)
+
+        hop = sample_rate / fps
+        n_frames = max(int(np.ceil(len(samples) / hop)), 1)
+        padded = np.zeros(int(np.ceil(n_frames * hop)) + 1, dtype=np.float32)
+        padded[:len(samples)] = samples
+
+        # Frame boundaries from a cumulative sum of squares (handles fractional hops)
+        energy_cum = np.concatenate(([0.0], np.cumsum(np.square(padded, dtype=np.float64))))
+        bounds = np.round(np.arange(n_frames + 1) * hop).astype(np.int64)
+        lengths = np.maximum(np.diff(bounds), 1)
+        rms = np.sqrt((energy_cum[bounds[1:]] - energy_cum[bounds[:-1]]) / lengths)
+
+        # Normalize against loud speech, gate out noise floor
+        reference = np.percentile(rms, 95) if np.any(rms > 0) else 1.0
+        level = np.clip(rms / max(reference, 1e-6), 0.0, 1.0)
+        level[level < 0.08] = 0.0
+
+        # Attack/release smoothing so the jaw doesn't flicker
+        smoothed = np.empty_like(level)
+        current = 0.0
+        for i, target in enumerate(level):
+            coeff = 0.7 if target > current else 0.35
+            current += coeff * (target - current)
+            smoothed[i] = current
+        return smoothed.astype(np.float32)
+
+    def _detect_face(self, image: np.ndarray) -> Tuple[int, int, int, int]:
+        """Largest face (x, y, w, h); centered guess if none found"""
+        face = face_detector.detect_largest(image)
+        if face is None:
+            logger.warning("No face detected - assuming centered portrait")
+            h, w = image.shape[:2]
+            size = int(min(w, h) * 0.5)
+            return (w - size) // 2, int(h * 0.2), size, size
+
+        return face[:4]
+
+    def _mouth_fields(self, face: Tuple[int, int, int, int], w: int, h: int):
+        """Precompute the mouth ROI, displacement fields and lip-gap shading"""
+        fx, fy, fw, fh = face
+        mouth_x = fx + fw * 0.5
+        mouth_y = fy + fh * 0.78
+        radius_x = fw * 0.32
+        radius_y = fh * 0.26
+
+        x0 = int(max(mouth_x - radius_x * 1.6, 0))
+        x1 = int(min(mouth_x + radius_x * 1.6, w))
+        y0 = int(max(mouth_y - radius_y * 1.4, 0))
+        y1 = int(min(mouth_y + radius_y * 2.0, h))
+
+        ys, xs = np.mgrid[y0:y1, x0:x1].astype(np.float32)
+        nx = (xs - mouth_x) / radius_x
+        ny = (ys - mouth_y) / radius_y
+        falloff = np.exp(-(nx ** 2 + ny ** 2) * 1.5)
+
+        # Jaw/lower lip move down, upper lip lifts slightly
+        max_drop = fh * self.MOUTH_OPEN_RATIO
+        direction = np.where(ny > 0, 1.0, -0.3).astype(np.float32)
+        dy_field = (max_drop * falloff * direction).astype(np.float32)
+        # Corners pull slightly inward as the mouth opens
+        dx_field = (-0.15 * max_drop * falloff * np.tanh(nx)).astype(np.float32)
+
+        # Thin ellipse between the lips, darkened as the mouth opens
+        shade = np.exp(-((nx / 0.55) ** 2 + (ny / 0.12) ** 2)).astype(np.float32)
+
+        return (x0, y0, x1, y1), dx_field, dy_field, shade
+
+
+# Global instance
+local_talking_head_engine = LocalTalkingHeadEngine()
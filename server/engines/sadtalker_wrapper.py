@@ -3,52 +3,22 @@ Technoaiamaze - Production-Grade LivePortrait with Failure Resistance
 GUARANTEED to never block video generation pipeline
 """
 import asyncio
-import aiohttp
 import logging
 from pathlib import Path
 from typing import Optional, Dict
 from gradio_client import Client
+try:
+    from gradio_client import handle_file
+except ImportError:  # gradio_client < 1.0 accepts plain paths
+    def handle_file(path):
+        return path
 import tempfile
-import shutil
-import os
-import time
 from core.config import settings
+from core.downloads import download_file
 
 logger = logging.getLogger(__name__)
 
 
-class LivePortraitCircuitBreaker:
-    """Prevent cascading failures from HF Space"""
-    
-    def __init__(self, failure_threshold=2, timeout=300):
-        self.failure_count = 0
-        self.failure_threshold = failure_threshold
-        self.timeout = timeout
-        self.last_failure_time = 0
-        self.is_open = False
-    
-    def record_success(self):
-        self.failure_count = 0
-        self.is_open = False
-    
-    def record_failure(self):
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        if self.failure_count >= self.failure_threshold:
-            self.is_open = True
-            logger.warning(f"🔴 LivePortrait circuit breaker OPEN")
-    
-    def can_attempt(self) -> bool:
-        if not self.is_open:
-            return True
-        if time.time() - self.last_failure_time > self.timeout:
-            logger.info("🔄 LivePortrait circuit breaker reset")
-            self.is_open = False
-            self.failure_count = 0
-            return True
-        return False
-
-
 class LivePortraitEngine:
     """
     Production-Grade LivePortrait with Total Failure Resistance
@@ -59,8 +29,9 @@ class LivePortraitEngine:
     def __init__(self, space_url: str = "KwaiVGI/LivePortrait"):
         self.space_url = space_url
         self.client = None
+        self._client_lock = asyncio.Lock()
         self.is_available = False
-        self.circuit_breaker = LivePortraitCircuitBreaker()
+        # Failures are tracked by the animation router's breaker (engine:liveportrait)
         
         logger.info(f"🎬 LivePortrait Engine initialized (HARDENED MODE)")
     
@@ -82,11 +53,6 @@ class LivePortraitEngine:
         logger.info(f"  Image: {image_path}")
         logger.info(f"  Audio: {audio_path}")
         
-        # Check circuit breaker
-        if not self.circuit_breaker.can_attempt():
-            logger.warning("⚡ LivePortrait circuit OPEN - returning immediate graceful failure")
-            return self._graceful_failure("circuit_breaker_open", image_path, audio_path)
-        
         try:
             # Attempt with timeout
             logger.info(f"Attempting LivePortrait generation (timeout: {timeout}s)...")
@@ -97,18 +63,15 @@ class LivePortraitEngine:
             )
             
             # SUCCESS!
-            self.circuit_breaker.record_success()
             logger.info(f"✅✅✅ LIVEPORTRAIT SUCCESS ✅✅✅")
             return result
             
         except asyncio.TimeoutError:
             logger.error(f"⏱️ LivePortrait timeout after {timeout}s")
-            self.circuit_breaker.record_failure()
             return self._graceful_failure("timeout", image_path, audio_path)
             
         except Exception as e:
             logger.error(f"❌ LivePortrait failed: {type(e).__name__}: {str(e)}")
-            self.circuit_breaker.record_failure()
             return self._graceful_failure("error", image_path, audio_path, str(e))
     
     async def _attempt_liveportrait_generation(
@@ -118,25 +81,32 @@ class LivePortraitEngine:
         output_path: str,
         options: Optional[Dict]
     ) -> Dict:
-        """Actual LivePortrait call - can fail"""
+        """
+        Actual LivePortrait call - can fail
         
-        # Initialize client
-        if self.client is None:
-            if settings.HF_TOKEN:
-                self.client = Client(self.space_url, hf_token=settings.HF_TOKEN)
-            else:
-                self.client = Client(self.space_url)
+        Uses Gradio's job API so the event loop only awaits the result;
+        if this coroutine is cancelled (e.g. by the timeout) the remote
+        job is cancelled too.
+        """
+        client = await self._get_client()
         
-        # Call API
-        result = self.client.predict(
-            image_path,
-            audio_path,
+        # Submit returns immediately; inference runs in the client's executor
+        job = client.submit(
+            handle_file(image_path),
+            handle_file(audio_path),
             True,  # relative_motion
             True,  # do_crop
             True,  # paste_back
             api_name="/gpu_wrapped_execute_video"
         )
         
+        try:
+            result = await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            logger.warning("🛑 Cancelling remote LivePortrait job")
+            job.cancel()
+            raise
+        
         # Extract video
         if isinstance(result, str):
             video_url = result
@@ -156,6 +126,16 @@ class LivePortraitEngine:
             "source": "liveportrait_hf"
         }
     
+    async def _get_client(self) -> Client:
+        """Create the Gradio client once, off the event loop (it does network I/O)"""
+        async with self._client_lock:
+            if self.client is None:
+                if settings.HF_TOKEN:
+                    self.client = await asyncio.to_thread(Client, self.space_url, hf_token=settings.HF_TOKEN)
+                else:
+                    self.client = await asyncio.to_thread(Client, self.space_url)
+            return self.client
+    
     def _graceful_failure(
         self,
         reason: str,
@@ -189,23 +169,9 @@ class LivePortraitEngine:
         }
     
     async def _download_file(self, url: str, output_path: str):
-        """Download file with error handling"""
+        """Download (or copy, for local Gradio temp files) the result video"""
         try:
-            if os.path.exists(url):
-                shutil.copy(url, output_path)
-                return
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        with open(output_path, 'wb') as f:
-                            while True:
-                                chunk = await response.content.read(8192)
-                                if not chunk:
-                                    break
-                                f.write(chunk)
-                    else:
-                        raise RuntimeError(f"Download failed: HTTP {response.status}")
+            await download_file(url, output_path, allow_local=True)
         except Exception as e:
             logger.error(f"Download error: {e}")
             raise
@@ -216,7 +182,8 @@ class LivePortraitEngine:
         image_path: str,
         audio_path: str,
         output_path: str,
-        style: str = "anime"
+        style: str = "anime",
+        options: Optional[Dict] = None
     ) -> Dict:
         """
         Generate anime animation (Delegates to standard generation for now)
@@ -226,7 +193,7 @@ class LivePortraitEngine:
             image_path=image_path,
             audio_path=audio_path,
             output_path=output_path,
-            options={"mode": "anime", "style": style}
+            options={**(options or {}), "mode": "anime", "style": style}
         )
 
 
@@ -0,0 +1,236 @@
+"""
+Antigravity AI - Edge-TTS Client Layer
+Global concurrency cap + token-bucket rate limiting + jittered retries
+Every edge-tts call in the server goes through `tts_client` so burst load
+queues locally instead of getting throttled by the Microsoft endpoint.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import aiohttp
+import edge_tts
+from edge_tts.exceptions import NoAudioReceived, UnexpectedResponse, WebSocketError
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses the endpoint uses when it is shedding load
+THROTTLE_STATUSES = {403, 429, 503}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until available. Returns seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+
+                delay = (1.0 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class TTSThrottledError(RuntimeError):
+    """Raised when the TTS endpoint keeps throttling after all retries"""
+
+
+class EdgeTTSClient:
+    """
+    Shared Edge-TTS client
+
+    - At most `max_concurrency` websocket sessions open at once
+    - New sessions are admitted at `rate_per_second` (bursting to `burst`)
+    - Transient failures retry with full-jitter exponential backoff
+    - EDGE_TTS_WSS_URL points the real edge_tts.Communicate at a local
+      websocket stand-in; `communicate_factory` replaces it entirely
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        communicate_factory: Optional[Callable[..., "edge_tts.Communicate"]] = None
+    ):
+        self.max_concurrency = max_concurrency or settings.EDGE_TTS_MAX_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.EDGE_TTS_MAX_RETRIES
+        self.backoff_base = backoff_base or settings.EDGE_TTS_BACKOFF_BASE
+        self.backoff_max = backoff_max or settings.EDGE_TTS_BACKOFF_MAX
+        self.communicate_factory = communicate_factory or edge_tts.Communicate
+        if settings.EDGE_TTS_WSS_URL:
+            # edge_tts has no endpoint parameter; Communicate reads this module global
+            edge_tts.communicate.WSS_URL = settings.EDGE_TTS_WSS_URL
+            logger.info(f"🗣️ Edge-TTS endpoint overridden: {settings.EDGE_TTS_WSS_URL}")
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(
+            rate=rate_per_second or settings.EDGE_TTS_RATE_PER_SECOND,
+            capacity=burst or settings.EDGE_TTS_BURST
+        )
+
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "throttled": 0,
+            "rate_limit_wait_seconds": 0.0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+        }
+
+        logger.info(
+            f"🗣️ Edge-TTS client initialized "
+            f"(concurrency={self.max_concurrency}, retries={self.max_retries})"
+        )
+
+    async def save(
+        self,
+        text: str,
+        voice: str,
+        output_path: str,
+        rate: str = "+0%",
+        pitch: str = "+0Hz"
+    ) -> None:
+        """Synthesize `text` to `output_path` (written atomically)"""
+        temp_path = f"{output_path}.{os.getpid()}.part"
+        try:
+            with open(temp_path, "wb") as f:
+                def rewind(_):
+                    f.seek(0)
+                    f.truncate()
+
+                async for chunk in self.stream(text, voice, rate=rate, pitch=pitch, on_retry=rewind):
+                    f.write(chunk)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def stream(
+        self,
+        text: str,
+        voice: str,
+        rate: str = "+0%",
+        pitch: str = "+0Hz",
+        on_retry: Optional[Callable[[int], object]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield audio chunks as they arrive
+
+        A transient failure is retried transparently only while nothing has
+        been yielded yet, unless `on_retry` is given: it is called before the
+        stream restarts so the consumer can discard partial output.
+        """
+        self.stats["requests"] += 1
+        attempt = 0
+
+        async with self._semaphore:
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+            try:
+                while True:
+                    self.stats["rate_limit_wait_seconds"] += await self._bucket.acquire()
+                    yielded = False
+                    try:
+                        communicate = self.communicate_factory(
+                            text=text, voice=voice, rate=rate, pitch=pitch
+                        )
+                        async for message in communicate.stream():
+                            if message["type"] == "audio":
+                                yielded = True
+                                yield message["data"]
+                        if self._ended_mid_turn(communicate):
+                            raise WebSocketError("Connection closed before turn.end (truncated audio)")
+
+                        self.stats["successes"] += 1
+                        return
+
+                    except Exception as e:
+                        throttled = self._is_throttled(e)
+                        if throttled:
+                            self.stats["throttled"] += 1
+
+                        resumable = not yielded or on_retry is not None
+                        if not self._is_transient(e) or not resumable or attempt >= self.max_retries:
+                            self.stats["failures"] += 1
+                            logger.error(f"Edge-TTS failed after {attempt + 1} attempt(s): {e}")
+                            if throttled:
+                                raise TTSThrottledError(str(e)) from e
+                            raise
+
+                        attempt += 1
+                        self.stats["retries"] += 1
+                        delay = self._backoff(attempt)
+                        logger.warning(
+                            f"Edge-TTS transient error ({type(e).__name__}: {e}) - "
+                            f"retry {attempt}/{self.max_retries} in {delay:.2f}s"
+                        )
+                        if yielded and on_retry is not None:
+                            on_retry(0)
+                        await asyncio.sleep(delay)
+            finally:
+                self.stats["in_flight"] -= 1
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _ended_mid_turn(communicate) -> bool:
+        """
+        A socket closed without turn.end just ends edge_tts' stream, so the
+        truncated audio would pass as a success. edge_tts >= 7.2 resets
+        state["chunk_audio_bytes"] at turn.end; leftover bytes mean it never came.
+        """
+        state = getattr(communicate, "state", None)
+        return isinstance(state, dict) and bool(state.get("chunk_audio_bytes"))
+
+    @staticmethod
+    def _is_throttled(error: Exception) -> bool:
+        return isinstance(error, aiohttp.ClientResponseError) and error.status in THROTTLE_STATUSES
+
+    @classmethod
+    def _is_transient(cls, error: Exception) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in THROTTLE_STATUSES or error.status >= 500
+        return isinstance(error, (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            ConnectionError,
+            NoAudioReceived,
+            UnexpectedResponse,
+            WebSocketError,
+        ))
+
+    def get_stats(self) -> dict:
+        """Counters for dashboards / health endpoint"""
+        return dict(self.stats)
+
+
+# Global instance
+tts_client = EdgeTTSClient()
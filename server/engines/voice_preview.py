@@ -0,0 +1,108 @@
+"""
+Antigravity AI - Voice Preview Service
+Serves short per-voice sample clips for the Studio voice picker.
+Pre-rendered MP3s are served as-is; missing ones are synthesized ONCE and persisted.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from core.config import settings
+from engines.tts_client import tts_client
+
+logger = logging.getLogger(__name__)
+
+
+class VoicePreviewService:
+    """
+    Cached voice preview clips
+
+    - Clips live in VOICE_PREVIEW_DIR as `<voice>.mp3`
+    - A missing clip is synthesized on first request and written atomically
+    - Concurrent requests for the same missing clip share one synthesis
+    - ETags are content hashes, memoized per (path, mtime, size)
+    """
+
+    def __init__(self, preview_dir: Optional[str] = None):
+        self.preview_dir = Path(preview_dir or settings.VOICE_PREVIEW_DIR)
+        self.preview_dir.mkdir(parents=True, exist_ok=True)
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._etags: Dict[str, Tuple[float, int, str]] = {}
+
+        logger.info(f"🔈 Voice Preview Service initialized ({self.preview_dir})")
+
+    def preview_path(self, voice: str) -> Path:
+        """Location of the persisted clip for a voice"""
+        return self.preview_dir / f"{voice}.mp3"
+
+    async def get_preview(self, voice: str) -> Path:
+        """
+        Return the path of the preview clip for `voice`, synthesizing it if missing
+
+        Callers are responsible for validating `voice` against the voice catalog.
+        """
+        path = self.preview_path(voice)
+        if path.exists() and path.stat().st_size > 0:
+            return path
+
+        task = self._inflight.get(voice)
+        if task is None:
+            task = asyncio.ensure_future(self._render_preview(voice, path))
+            self._inflight[voice] = task
+            task.add_done_callback(lambda _: self._inflight.pop(voice, None))
+        else:
+            logger.info(f"Voice preview for '{voice}' already rendering - joining")
+
+        # Shield so a client disconnect doesn't cancel the shared render
+        return await asyncio.shield(task)
+
+    async def _render_preview(self, voice: str, path: Path) -> Path:
+        """Synthesize a preview clip and persist it with an atomic rename"""
+        # Another worker process may have rendered it meanwhile
+        if path.exists() and path.stat().st_size > 0:
+            return path
+
+        logger.info(f"🎙️ Rendering missing voice preview: {voice}")
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            await tts_client.save(
+                text=settings.VOICE_PREVIEW_TEXT,
+                voice=voice,
+                output_path=str(temp_path)
+            )
+
+            if not temp_path.exists() or temp_path.stat().st_size == 0:
+                raise RuntimeError(f"Empty preview rendered for {voice}")
+
+            os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        logger.info(f"✓ Voice preview saved: {path}")
+        return path
+
+    def get_etag(self, path: Path) -> str:
+        """Strong ETag derived from clip content (recomputed only when the file changes)"""
+        stat = path.stat()
+        cached = self._etags.get(str(path))
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+
+        etag = f'"{digest.hexdigest()[:32]}"'
+        self._etags[str(path)] = (stat.st_mtime, stat.st_size, etag)
+        return etag
+
+
+# Global instance
+voice_preview_service = VoicePreviewService()
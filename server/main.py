@@ -70,9 +70,12 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down...")
     
-    # Clear GPU memory
-    from engines import animator, enhancer
+    # Close pooled engine sessions and enhancement workers, clear GPU memory
+    from engines.animator import animator
+    from engines.enhancer import enhancer
+    await animator.close()
     animator.clear_gpu_memory()
+    enhancer.close()
     enhancer.clear_gpu_memory()
     
     logger.info("✓ Shutdown complete")
@@ -93,6 +96,9 @@ async def root():
 async def health_check():
     """Detailed health check"""
     import torch
+    from engines.tts_client import tts_client
+    from engines.animator import animator
+    from core.circuit_breaker import get_breaker_states
     
     return {
         "status": "healthy",
@@ -100,6 +106,9 @@ async def health_check():
         "cuda_devices": torch.cuda.device_count() if torch.cuda.is_available() else 0,
         "edge_tts": settings.USE_EDGE_TTS,
         "coqui_tts": settings.USE_COQUI_TTS,
+        "tts_client": tts_client.get_stats(),
+        "animation_engines": animator.get_engine_health(),
+        "circuit_breakers": get_breaker_states(),
     }
 
 
@@ -3,24 +3,31 @@ Antigravity AI - V1 Generation API Routes
 Video generation endpoints with FastAPI BackgroundTasks (No Celery/Redis required)
 Supports Real-time and Anime avatar modes
 """
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Literal, List, Dict
 import uuid
+import json
 import os
 from pathlib import Path
 import logging
 import cv2
 import shutil
 import asyncio
+import io
 import tempfile
+import numpy as np
+from PIL import Image, ImageOps
 
 # Remove Celery/MinIO imports to avoid dependency errors
 # from core.celery_app import celery_app
 # from core.storage import storage
-from engines import audio_synthesizer, animator, enhancer
+from engines.audio_synthesizer import audio_synthesizer
+from engines.animator import animator
 from engines.avatar_generator import avatar_generator
+from engines.voice_preview import voice_preview_service
+from engines.face_detection import face_detector
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -44,6 +51,14 @@ class GenerationRequest(BaseModel):
     mode: Literal["real", "anime"] = "real"
     style: Optional[str] = "anime"
     avatar_id: Optional[str] = None  # For pre-made avatars
+    voice_id: Optional[str] = None  # Cloned voice from /voices/clone
+
+
+class TTSPreviewRequest(BaseModel):
+    """Streaming TTS preview request"""
+    text: str
+    archetype: str = "narrator_male"
+    language: Optional[str] = None
 
 
 class GenerationStatus(BaseModel):
@@ -60,6 +75,72 @@ class GenerationStatus(BaseModel):
     fallback_used: bool = False
 
 
+class NoFaceDetectedError(ValueError):
+    """Real-mode input has no detectable face"""
+
+
+def _preprocess_image(data: bytes, output_path: Path, mode: str, max_side: Optional[int]) -> Dict:
+    """
+    Decode once, apply EXIF orientation, crop around the face, downscale
+
+    Runs in a worker thread. Real-mode images without a face raise
+    NoFaceDetectedError; anime images are kept whole if no face is found.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as pil_image:
+            pil_image = ImageOps.exif_transpose(pil_image).convert("RGB")
+            image = cv2.cvtColor(np.asarray(pil_image), cv2.COLOR_RGB2BGR)
+    except Exception as e:
+        raise ValueError(f"Unreadable image: {e}")
+
+    h, w = image.shape[:2]
+    info = {"original_size": [w, h], "face": None}
+
+    # Detect on a small copy; scale the box back
+    scale = min(1.0, settings.PREPROCESS_DETECT_MAX_SIDE / max(h, w))
+    small = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+    face = face_detector.detect_largest(small)
+
+    if face is None:
+        if mode == "real" and face_detector.is_available:
+            raise NoFaceDetectedError("No face detected in the uploaded photo")
+    else:
+        fx, fy, fw, fh = (int(round(v / scale)) for v in face[:4])
+        info["face"] = [fx, fy, fw, fh]
+
+        # Portrait crop: face centered horizontally, ~40% from the top, room for shoulders
+        crop_w = min(int(fw * settings.PREPROCESS_FACE_MARGIN), w)
+        crop_h = min(int(crop_w * 1.25), h)
+        cx, cy = fx + fw / 2.0, fy + fh / 2.0
+        x0 = int(min(max(cx - crop_w / 2.0, 0), w - crop_w))
+        y0 = int(min(max(cy - crop_h * 0.4, 0), h - crop_h))
+        image = image[y0:y0 + crop_h, x0:x0 + crop_w]
+
+    h, w = image.shape[:2]
+    ratio = min(1.0, max_side / max(h, w)) if max_side else 1.0
+    new_w, new_h = max(int(w * ratio) // 2 * 2, 2), max(int(h * ratio) // 2 * 2, 2)
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+    if not cv2.imwrite(str(output_path), image, [cv2.IMWRITE_JPEG_QUALITY, settings.PREPROCESS_JPEG_QUALITY]):
+        raise ValueError("Failed to write preprocessed image")
+
+    info["size"] = [new_w, new_h]
+    info["bytes"] = output_path.stat().st_size
+    return info
+
+
+async def preprocess_input_image(data: bytes, output_path: Path, mode: str) -> Dict:
+    """Preprocessing stage between upload and the (paid) animation engines"""
+    max_side = animator.preferred_input_resolution(mode)
+    info = await asyncio.to_thread(_preprocess_image, data, output_path, mode, max_side)
+    logger.info(
+        f"🖼️ Preprocessed input {info['original_size'][0]}x{info['original_size'][1]} → "
+        f"{info['size'][0]}x{info['size'][1]} ({info['bytes']} bytes, face={'yes' if info['face'] else 'no'})"
+    )
+    return info
+
+
 async def process_video_generation_task(
     job_id: str,
     image_path: str,
@@ -69,7 +150,8 @@ async def process_video_generation_task(
     language: Optional[str],
     enhance: bool,
     mode: str = "real",
-    style: str = "anime"
+    style: str = "anime",
+    voice_id: Optional[str] = None
 ):
     """
     HARDENED Video Generation Task (Safe Executor)
@@ -121,12 +203,15 @@ async def process_video_generation_task(
         try:
             logger.info(f"[{job_id}] 🔊 Generating audio...")
             # Attempt 1
-            await audio_synthesizer.synthesize(
+            audio_result = await audio_synthesizer.synthesize(
                 text=text,
                 output_path=str(audio_path),
                 archetype=archetype,
-                language=language
+                language=language,
+                voice_id=voice_id
             )
+            # Animate from the post-processed (trimmed, normalized) track
+            audio_path = Path(audio_result["audio_path"])
         except Exception as e:
             logger.warning(f"[{job_id}] ⚠️ Audio generation failed (Attempt 1): {e}")
             # Retry / Fallback logic for audio could go here
@@ -266,7 +351,8 @@ async def create_generation_job(
     enhance: bool = Form(True, description="Enable GFPGAN enhancement"),
     mode: str = Form("real", description="Mode: 'real' or 'anime'"),
     style: str = Form("anime", description="Anime style: 'anime', 'cartoon', '3d'"),
-    avatar_id: Optional[str] = Form(None, description="Pre-made avatar ID (for anime mode)")
+    avatar_id: Optional[str] = Form(None, description="Pre-made avatar ID (for anime mode)"),
+    voice_id: Optional[str] = Form(None, description="Cloned voice ID from /voices/clone")
 ) -> JSONResponse:
     """
     Submit video generation job
@@ -275,36 +361,52 @@ async def create_generation_job(
     logger.info(f"New generation job: {job_id} (mode={mode})")
     
     try:
+        if voice_id:
+            # Fail at submission, not later inside the background job
+            if not audio_synthesizer.is_valid_voice_id(voice_id):
+                raise HTTPException(400, "Invalid voice_id (expected a 64-character SHA-256 hex digest)")
+            if not audio_synthesizer.coqui_tts_enabled:
+                raise HTTPException(400, "Voice cloning requires Coqui XTTS (USE_COQUI_TTS)")
+            if not audio_synthesizer.has_voice(voice_id):
+                raise HTTPException(404, f"Unknown voice_id: {voice_id}")
+        
         image_path = None
         
         # Handle Image Input
+        image_data = None
         if mode == "real":
             if not image:
                 raise HTTPException(400, "Image file required for Real mode")
-            
-            # Save uploaded image
-            image_path = TEMP_DIR / f"{job_id}_input.jpg"
-            with open(image_path, "wb") as f:
-                f.write(await image.read())
+            image_data = await image.read()
                 
         elif mode == "anime":
             if image:
                 # User uploaded custom anime image
-                image_path = TEMP_DIR / f"{job_id}_input.jpg"
-                with open(image_path, "wb") as f:
-                    f.write(await image.read())
+                image_data = await image.read()
             elif avatar_id:
                 # Use pre-made avatar
                 gallery_path = avatar_generator.get_avatar_path(avatar_id)
                 if not gallery_path:
                     raise HTTPException(400, f"Avatar ID not found: {avatar_id}")
-                
-                # Copy to temp
-                image_path = TEMP_DIR / f"{job_id}_input.png"
-                shutil.copy(gallery_path, image_path)
+                with open(gallery_path, "rb") as f:
+                    image_data = f.read()
             else:
                 raise HTTPException(400, "For Anime mode, provide image OR avatar_id")
         
+        # Preprocess (reject faceless photos before any paid stage runs)
+        image_path = TEMP_DIR / f"{job_id}_input.jpg"
+        if image_data is not None:
+            if settings.PREPROCESS_ENABLED:
+                try:
+                    await preprocess_input_image(image_data, image_path, mode)
+                except NoFaceDetectedError as e:
+                    raise HTTPException(400, f"{e}. Please upload a clear, front-facing portrait.")
+                except ValueError as e:
+                    raise HTTPException(400, str(e))
+            else:
+                with open(image_path, "wb") as f:
+                    f.write(image_data)
+        
         # Validate image exists
         if not image_path or not os.path.exists(image_path):
             raise HTTPException(400, "Failed to process input image")
@@ -320,7 +422,8 @@ async def create_generation_job(
             language=language,
             enhance=enhance,
             mode=mode,
-            style=style
+            style=style,
+            voice_id=voice_id
         )
         
         return JSONResponse({
@@ -463,3 +566,187 @@ async def list_voices() -> JSONResponse:
         "voices": voices,
         "archetypes": list(settings.VOICE_ARCHETYPES.keys())
     })
+
+
+@router.post("/voices/clone")
+async def clone_voice(
+    reference: UploadFile = File(..., description="Reference voice clip (6-30s of clean speech)")
+) -> JSONResponse:
+    """
+    Register a reference clip for voice cloning (Coqui XTTS)
+    
+    Speaker latents are computed once and cached; pass the returned
+    voice_id to /generate to synthesize with this voice.
+    """
+    suffix = Path(reference.filename or "reference.wav").suffix or ".wav"
+    reference_path = TEMP_DIR / f"{uuid.uuid4()}_voice_ref{suffix}"
+    
+    try:
+        with open(reference_path, "wb") as f:
+            f.write(await reference.read())
+        
+        result = await audio_synthesizer.register_voice(str(reference_path))
+        return JSONResponse(result)
+    
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        logger.error(f"Voice cloning failed: {e}")
+        raise HTTPException(500, str(e))
+    finally:
+        if reference_path.exists():
+            reference_path.unlink()
+
+
+
+@router.post("/tts/preview")
+async def stream_tts_preview(request: TTSPreviewRequest) -> StreamingResponse:
+    """
+    Stream synthesized speech as it is generated (chunked audio/mpeg)
+    
+    Shares the TTS cache with /generate, so generating a video from the
+    same script afterwards skips synthesis.
+    """
+    text = request.text.strip()
+    if not text:
+        raise HTTPException(400, "Text is required")
+    if len(text) > settings.TTS_PREVIEW_MAX_CHARS:
+        raise HTTPException(400, f"Text too long for preview (max {settings.TTS_PREVIEW_MAX_CHARS} chars)")
+    
+    chunks = audio_synthesizer.stream_edge_tts(
+        text=text,
+        archetype=request.archetype,
+        language=request.language
+    )
+    
+    # Pull the first chunk before committing to a 200 so failures surface as errors
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(503, "No audio produced")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        logger.error(f"TTS preview failed: {e}")
+        raise HTTPException(503, "TTS preview temporarily unavailable")
+    
+    async def body():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
+
+def _parse_byte_range(range_header: str, file_size: int) -> Optional[tuple]:
+    """
+    Parse a single `bytes=start-end` range (RFC 7233)
+
+    Returns (start, end) inclusive, None for unsupported/multi ranges,
+    raises HTTPException(416) if the range is not satisfiable.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str == "":
+            # Suffix range: last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError
+            start = max(file_size - length, 0)
+            end = file_size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+            end = min(end, file_size - 1)
+    except ValueError:
+        return None
+
+    if start >= file_size or start > end:
+        raise HTTPException(
+            416,
+            "Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, end
+
+
+@router.get("/voices/preview/{voice}")
+async def preview_voice(voice: str, request: Request) -> Response:
+    """
+    Stream a short sample of a voice (cached, ETag + byte-range aware)
+    """
+    known_voices = {v["voice"] for v in audio_synthesizer.get_available_voices()}
+    if voice not in known_voices:
+        raise HTTPException(404, f"Unknown voice: {voice}")
+
+    try:
+        path = await voice_preview_service.get_preview(voice)
+    except Exception as e:
+        logger.error(f"Voice preview failed for {voice}: {e}")
+        raise HTTPException(503, "Voice preview temporarily unavailable")
+
+    etag = voice_preview_service.get_etag(path)
+    file_size = path.stat().st_size
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.VOICE_PREVIEW_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_byte_range(range_header, file_size)
+
+    if byte_range is None:
+        return FileResponse(str(path), media_type="audio/mpeg", headers=headers)
+
+    start, end = byte_range
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start + 1)
+
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    return Response(content=body, status_code=206, media_type="audio/mpeg", headers=headers)
+
+
+@router.post("/webhooks/heygen")
+async def heygen_webhook(request: Request) -> JSONResponse:
+    """
+    HeyGen completion callback (avatar_video.success / avatar_video.fail)
+
+    Wakes the job waiting on that video instead of it polling the API.
+    """
+    from engines.heygen_wrapper import heygen_engine
+
+    if not settings.HEYGEN_WEBHOOK_URL:
+        raise HTTPException(404, "HeyGen webhooks are not enabled")
+    if not heygen_engine.webhooks_enabled:
+        raise HTTPException(401, "HeyGen webhook secret is not configured")
+
+    body = await request.body()
+    if not heygen_engine.verify_webhook(body, request.headers.get("signature")):
+        raise HTTPException(401, "Invalid webhook signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(400, "Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(400, "Webhook payload must be a JSON object")
+
+    video_id = heygen_engine.notify_completion(payload)
+    return JSONResponse({"status": "ok" if video_id else "ignored", "video_id": video_id})
@@ -0,0 +1,112 @@
+"""
+GFPGAN enhancement throughput benchmark
+
+Compares the per-frame GFPGANer.enhance() loop with FaceEnhancer.enhance_frames()
+at several batch sizes on frames read from a video, then the ONNX Runtime
+backends against torch (frames/sec, PSNR / SSIM of the enhanced frames).
+Needs GFPGAN weights (GFPGAN_WEIGHTS).
+
+Usage:
+    python scripts/benchmark_enhancer.py --video sample.mp4 --frames 32 --batch-sizes 1,4,8
+    python scripts/benchmark_enhancer.py --video sample.mp4 --backends torch,onnx,onnx-int8
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from skimage.metrics import peak_signal_noise_ratio, structural_similarity
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config import settings  # noqa: E402
+from engines.enhancer import enhancer  # noqa: E402
+
+
+def read_frames(video_path: str, count: int):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def similarity(reference, output):
+    """Mean PSNR (dB) / SSIM of enhanced frames against the reference backend"""
+    psnr = [peak_signal_noise_ratio(a, b, data_range=255) for a, b in zip(reference, output)]
+    ssim = [structural_similarity(a, b, channel_axis=2, data_range=255) for a, b in zip(reference, output)]
+    return float(np.mean(psnr)), float(np.mean(ssim))
+
+
+def compare_backends(frames, backends, weight):
+    """Throughput and output similarity of each backend vs the first one"""
+    # Same fixed noise as the exported graph, so PSNR/SSIM measure only export/quantization error
+    enhancer.randomize_noise = False
+    reference = None
+    for name in backends:
+        enhancer.use_backend("torch" if name == "torch" else "onnx", quantize=name == "onnx-int8")
+        if name != "torch" and enhancer.backend != "onnx":
+            print(f"{name:>16}: unavailable")
+            continue
+        enhancer.enhance_frames(frames[:1], weight=weight)  # warm-up
+        output, seconds = timed(lambda: enhancer.enhance_frames(frames, weight))
+        line = f"{name:>16}: {len(frames) / seconds:6.2f} fps"
+        if reference is None:
+            reference = output
+            line += "  (reference)"
+        else:
+            psnr, ssim = similarity(reference, output)
+            line += f"  PSNR {psnr:5.2f} dB  SSIM {ssim:.4f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched GFPGAN enhancement")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--weight", type=float, default=0.5)
+    parser.add_argument("--backends", default="", help="e.g. torch,onnx,onnx-int8 (first is the reference)")
+    args = parser.parse_args()
+
+    enhancer.load_model()
+    if enhancer.enhancer is None:
+        sys.exit("GFPGAN not available (check GFPGAN_WEIGHTS)")
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        sys.exit(f"No frames read from {args.video}")
+    print(f"{len(frames)} frames {frames[0].shape[1]}x{frames[0].shape[0]} on {enhancer.device}")
+
+    # Warm-up (CUDA context, cuDNN autotuning)
+    enhancer.enhance_frames(frames[:1], weight=args.weight)
+
+    reference, seconds = timed(lambda: [
+        enhancer.enhancer.enhance(frame, paste_back=True, weight=args.weight)[2] for frame in frames
+    ])
+    print(f"{'per-frame loop':>16}: {len(frames) / seconds:6.2f} fps")
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        output, seconds = timed(lambda: enhancer.enhance_frames(frames, args.weight, batch_size))
+        diff = max(int(np.abs(a.astype(np.int16) - b).max()) for a, b in zip(reference, output))
+        print(f"{f'batch {batch_size}':>16}: {len(frames) / seconds:6.2f} fps  (max pixel diff {diff})")
+
+    if args.backends:
+        print(f"\nBackends (batch {settings.ENHANCE_BATCH_SIZE}):")
+        compare_backends(frames, args.backends.split(","), args.weight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+End-to-end check of the HeyGen webhook flow against the local stand-in
+
+Starts scripts/heygen_standin.py in-process plus a receiver that handles
+callbacks the way /api/v1/webhooks/heygen does, then runs one
+HeyGenEngine.generate_video. Passes if the job is woken by the signed
+webhook (finishes well before the safety-net poll, no status polls).
+Needs ffmpeg for the audio upload transcode.
+
+Usage:
+    python scripts/check_heygen_webhook.py --render-seconds 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.config import settings  # noqa: E402
+from engines.heygen_wrapper import HeyGenEngine  # noqa: E402
+from scripts.heygen_standin import build_app  # noqa: E402
+
+SECRET = "check-secret"
+
+
+def receiver_app(engine: HeyGenEngine) -> web.Application:
+    async def webhook(request):
+        body = await request.read()
+        if not engine.verify_webhook(body, request.headers.get("signature")):
+            return web.json_response({"detail": "Invalid webhook signature"}, status=401)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            return web.json_response({"detail": "Webhook payload must be a JSON object"}, status=400)
+        video_id = engine.notify_completion(payload)
+        return web.json_response({"status": "ok" if video_id else "ignored", "video_id": video_id})
+
+    app = web.Application()
+    app.add_routes([web.post("/api/v1/webhooks/heygen", webhook)])
+    return app
+
+
+async def start(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def run(render_seconds: float, standin_port: int, receiver_port: int) -> bool:
+    work_dir = tempfile.mkdtemp(prefix="heygen_check_")
+    image_path = os.path.join(work_dir, "face.png")
+    audio_path = os.path.join(work_dir, "speech.wav")
+    video_file = os.path.join(work_dir, "result.mp4")
+    with open(image_path, "wb") as f:
+        f.write(os.urandom(1024))
+    with wave.open(audio_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\0\0" * 16000)
+    with open(video_file, "wb") as f:
+        f.write(os.urandom(256 * 1024))
+
+    settings.HEYGEN_BASE_URL = f"http://127.0.0.1:{standin_port}/v2"
+    settings.HEYGEN_WEBHOOK_URL = f"http://127.0.0.1:{receiver_port}/api/v1/webhooks/heygen"
+    settings.HEYGEN_WEBHOOK_SECRET = SECRET
+    engine = HeyGenEngine(api_key="check")
+
+    standin = await start(build_app(render_seconds, SECRET, video_file), standin_port)
+    receiver = await start(receiver_app(engine), receiver_port)
+    try:
+        started = time.monotonic()
+        result = await engine.generate_video(image_path, audio_path, os.path.join(work_dir, "out.mp4"))
+        elapsed = time.monotonic() - started
+        stats = standin.app["stats"]
+    finally:
+        await engine.close()
+        await receiver.cleanup()
+        await standin.cleanup()
+
+    ok = (
+        result.get("status") == "success"
+        and stats["webhooks_sent"] == 1
+        and stats["status_polls"] == 0
+        and elapsed < settings.HEYGEN_WEBHOOK_POLL_INTERVAL
+    )
+    print(f"{'PASS' if ok else 'FAIL'}: {result.get('status')} in {elapsed:.1f}s "
+          f"(render {render_seconds}s), stand-in stats {stats}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the HeyGen stand-in's webhook end to end")
+    parser.add_argument("--render-seconds", type=float, default=2.0)
+    parser.add_argument("--standin-port", type=int, default=8090)
+    parser.add_argument("--receiver-port", type=int, default=8091)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.render_seconds, args.standin_port, args.receiver_port)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Local Edge-TTS websocket stand-in for testing the TTS client under load
+
+Speaks enough of the Edge read-aloud protocol for edge_tts.Communicate
+(turn.start, binary audio frames, turn.end) and can misbehave like the real
+endpoint does when it sheds load: reject the websocket handshake with
+429 / 503 / 403, or drop the connection in the middle of the audio stream.
+
+Usage:
+    python scripts/edge_tts_standin.py --port 8766 --reject-rate 0.3 --reject-status 429 --drop-rate 0.2
+
+    EDGE_TTS_WSS_URL="ws://127.0.0.1:8766/edge/v1?TrustedClientToken=test" uvicorn main:app
+
+GET /_stats shows how many connections were accepted, rejected and dropped.
+"""
+import argparse
+import asyncio
+import os
+import random
+import uuid
+
+from aiohttp import web
+
+
+def build_app(
+    audio: bytes,
+    chunk_size: int = 4096,
+    chunk_delay: float = 0.01,
+    reject_rate: float = 0.0,
+    reject_status: int = 429,
+    drop_rate: float = 0.0,
+    drop_after: int = 2
+) -> web.Application:
+    stats = {"connections": 0, "rejected": 0, "dropped": 0, "completed": 0}
+
+    def text_frame(request_id: str, path: str, body: str = "{}") -> str:
+        return (
+            f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n"
+            f"Path:{path}\r\n\r\n{body}"
+        )
+
+    def audio_frame(request_id: str, data: bytes) -> bytes:
+        content_type = "Content-Type:audio/mpeg\r\n" if data else ""
+        header = f"X-RequestId:{request_id}\r\n{content_type}Path:audio\r\n".encode()
+        return len(header).to_bytes(2, "big") + header + data
+
+    async def synthesize(request):
+        stats["connections"] += 1
+        if random.random() < reject_rate:
+            stats["rejected"] += 1
+            return web.Response(status=reject_status, text="simulated throttling")
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        drop = random.random() < drop_rate
+
+        async for message in ws:
+            if message.type != web.WSMsgType.TEXT or "Path:ssml" not in message.data:
+                continue  # speech.config
+
+            request_id = uuid.uuid4().hex
+            await ws.send_str(text_frame(request_id, "turn.start"))
+            for index, start in enumerate(range(0, len(audio), chunk_size)):
+                if drop and index >= drop_after:
+                    stats["dropped"] += 1
+                    request.transport.close()  # abrupt disconnect, no close frame
+                    return ws
+                await ws.send_bytes(audio_frame(request_id, audio[start:start + chunk_size]))
+                await asyncio.sleep(chunk_delay)
+            await ws.send_bytes(audio_frame(request_id, b""))
+            await ws.send_str(text_frame(request_id, "turn.end"))
+            stats["completed"] += 1
+
+        return ws
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.add_routes([
+        web.get("/edge/v1", synthesize),
+        web.get("/_stats", get_stats),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Edge-TTS websocket stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--audio", help="MP3 streamed as the result (default: 64 KB of random bytes)")
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between audio frames")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of handshakes rejected")
+    parser.add_argument("--reject-status", type=int, default=429, help="e.g. 429, 503 or 403")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of streams cut mid-audio")
+    parser.add_argument("--drop-after", type=int, default=2, help="audio frames sent before a drop")
+    args = parser.parse_args()
+
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            audio = f.read()
+    else:
+        audio = os.urandom(64 * 1024)
+
+    app = build_app(
+        audio, args.chunk_size, args.chunk_delay,
+        args.reject_rate, args.reject_status, args.drop_rate, args.drop_after
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Local HeyGen stand-in for testing the HeyGen engine without credits
+
+Implements the endpoints HeyGenEngine uses (asset upload, video generate,
+video status, result download) and, when the request carries a
+callback_url, posts a signed avatar_video.success webhook once the
+simulated render finishes.
+
+Usage:
+    python scripts/heygen_standin.py --port 8090 --render-seconds 20 --secret dev-secret
+
+    HEYGEN_API_KEY=test \
+    HEYGEN_BASE_URL=http://127.0.0.1:8090/v2 \
+    HEYGEN_WEBHOOK_URL=http://127.0.0.1:8000/api/v1/webhooks/heygen \
+    HEYGEN_WEBHOOK_SECRET=dev-secret \
+    uvicorn main:app
+
+GET /_stats shows how many status polls / uploads the server received.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+
+def build_app(render_seconds: float, secret: str, video_file: str, fail_rate: float = 0.0) -> web.Application:
+    jobs = {}
+    stats = {"asset_requests": 0, "uploads": 0, "upload_bytes": 0, "generate": 0, "status_polls": 0,
+             "webhooks_sent": 0, "downloads": 0}
+
+    def base(request: web.Request) -> str:
+        return f"{request.scheme}://{request.host}"
+
+    async def asset_upload(request):
+        stats["asset_requests"] += 1
+        asset_id = uuid.uuid4().hex
+        return web.json_response({"data": {"asset_id": asset_id, "upload_url": f"{base(request)}/upload/{asset_id}"}})
+
+    async def put_asset(request):
+        size = 0
+        async for chunk in request.content.iter_chunked(256 * 1024):
+            size += len(chunk)
+        stats["uploads"] += 1
+        stats["upload_bytes"] += size
+        return web.Response(status=200)
+
+    async def generate(request):
+        stats["generate"] += 1
+        payload = await request.json()
+        video_id = uuid.uuid4().hex
+        failed = (int(video_id[:8], 16) / 0xFFFFFFFF) < fail_rate
+        jobs[video_id] = {"started": time.time(), "failed": failed, "video_url": f"{base(request)}/files/{video_id}.mp4"}
+        if payload.get("callback_url"):
+            asyncio.create_task(send_webhook(payload["callback_url"], video_id))
+        return web.json_response({"data": {"video_id": video_id}})
+
+    def job_status(job) -> str:
+        if time.time() - job["started"] < render_seconds:
+            return "processing"
+        return "failed" if job["failed"] else "completed"
+
+    async def status(request):
+        stats["status_polls"] += 1
+        job = jobs.get(request.match_info["video_id"])
+        if job is None:
+            return web.json_response({"error": "not found"}, status=404)
+        data = {"status": job_status(job)}
+        if data["status"] == "completed":
+            data["video_url"] = job["video_url"]
+        elif data["status"] == "failed":
+            data["error"] = "simulated failure"
+        return web.json_response({"data": data})
+
+    async def send_webhook(callback_url: str, video_id: str):
+        await asyncio.sleep(render_seconds)
+        job = jobs[video_id]
+        if job["failed"]:
+            event = {"event_type": "avatar_video.fail", "event_data": {"video_id": video_id, "msg": "simulated failure"}}
+        else:
+            event = {"event_type": "avatar_video.success", "event_data": {"video_id": video_id, "url": job["video_url"]}}
+        body = json.dumps(event).encode()
+        headers = {"Content-Type": "application/json"}
+        if secret:
+            headers["Signature"] = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        async with aiohttp.ClientSession() as session:
+            async with session.post(callback_url, data=body, headers=headers) as resp:
+                stats["webhooks_sent"] += 1
+                print(f"webhook {video_id} -> {resp.status}")
+
+    async def download(request):
+        stats["downloads"] += 1
+        return web.FileResponse(video_file)  # honours Range requests
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app["stats"] = stats
+    app.add_routes([
+        web.post("/v2/assets/upload", asset_upload),
+        web.put("/upload/{asset_id}", put_asset),
+        web.post("/v2/video/generate", generate),
+        web.get("/v2/video/{video_id}", status),
+        web.get("/files/{name}", download),
+        web.get("/_stats", get_stats),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HeyGen API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--render-seconds", type=float, default=20.0)
+    parser.add_argument("--secret", default="", help="webhook HMAC secret")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of jobs that fail")
+    parser.add_argument("--video", help="MP4 served as the result (default: 2 MB of random bytes)")
+    args = parser.parse_args()
+
+    video_file = args.video
+    if not video_file:
+        fd, video_file = tempfile.mkstemp(suffix=".mp4")
+        os.write(fd, os.urandom(2 * 1024 * 1024))
+        os.close(fd)
+
+    app = build_app(args.render_seconds, args.secret, video_file, args.fail_rate)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()